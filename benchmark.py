@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+
+"""
+Measurements of the drone's synthesis path, runnable without a sound card.
+
+    python benchmark.py allocations
+    python benchmark.py follower
+    python benchmark.py voices
+"""
+
+import argparse
+import functools
+import time
+import tracemalloc
+
+import numpy
+
+from callback import make_callback
+from commands import CommandQueue
+from follower import EnvelopeFollower
+from monitor import CallbackMonitor
+from synth import (CHUNK_SIZE, SAMPLE_RATE, build_bank, chord_frequencies,
+                   frequency_map)
+
+
+def _traced_peak(function):
+    """
+    Call function and return how many bytes above the starting level
+    tracemalloc saw allocated at the peak of the call
+    """
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    return peak - before
+
+
+def _noise_chunks(chunk_size, count=16):
+    """
+    Returns: list of bytes, count chunks of noise shaped like PyAudio input
+    """
+    noise = numpy.random.uniform(-0.5, 0.5, (count, chunk_size))
+    return [chunk.astype(numpy.float32).tobytes() for chunk in noise]
+
+
+def _allocations(calls, count, warmup=10, between=None):
+    """
+    Measure the memory allocated by each call after warm-up
+
+    Every traced allocation made during a call, even one freed before it
+    returns, raises tracemalloc's peak. The cost of measuring an empty
+    call is subtracted, so a call that allocates nothing reports 0.
+
+    Args:
+        calls (list of callable): Called in turn, without arguments
+        count (int): Number of calls to measure
+        warmup (int): Number of calls made before measuring
+        between (callable): Called unmeasured after every measured call
+
+    Returns: list of int, bytes allocated during each measured call
+    """
+    for i in range(warmup):
+        calls[i % len(calls)]()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        baseline = min(_traced_peak(lambda: None) for i in range(10))
+        sizes = []
+        for i in range(count):
+            sizes.append(max(0, _traced_peak(calls[i % len(calls)]) -
+                             baseline))
+            if between is not None:
+                between()
+        return sizes
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def measure_allocations(bank=None, chunks=1000, warmup=10,
+                        sample_rate=SAMPLE_RATE):
+    """
+    Measure the memory allocated by each audio callback after warm-up
+
+    The callback is the one drone.py plays through, draining an empty
+    command queue, following noise shaped like PyAudio input, rendering a
+    chunk and recording its timing.
+
+    The bank's control streams are refilled between chunks, as a
+    ControlProducer would keep them full while playing live.
+
+    Args:
+        bank (OscillatorBank): Defaults to a freshly built, playing drone
+        chunks (int): Number of chunks to measure
+        warmup (int): Number of chunks rendered before measuring
+        sample_rate (int): Sample rate bank was built for
+
+    Returns: list of int, bytes allocated during each measured callback
+    """
+    if bank is None:
+        bank = build_bank(sample_rate, start_mode='ON')
+    follower = EnvelopeFollower(sample_rate, bank.chunk_size)
+    monitor = CallbackMonitor(bank.chunk_size, sample_rate)
+    callback = make_callback(bank, follower, CommandQueue(), monitor)
+    calls = [functools.partial(callback, in_data, bank.chunk_size, None, 0)
+             for in_data in _noise_chunks(bank.chunk_size)]
+
+    def fill_streams():
+        for stream in bank.control_streams:
+            stream.fill()
+
+    return _allocations(calls, chunks, warmup, fill_streams)
+
+
+def measure_follower_allocations(follower, chunks=1000, warmup=10):
+    """
+    Measure the memory allocated by the envelope follower on each chunk of
+    noise shaped like PyAudio input, after warm-up
+
+    Args:
+        follower (EnvelopeFollower):
+        chunks (int): Number of chunks to measure
+        warmup (int): Number of chunks followed before measuring
+
+    Returns: list of int, bytes allocated during each measured chunk
+    """
+    calls = [functools.partial(follower.process, in_data)
+             for in_data in _noise_chunks(follower.chunk_size)]
+    return _allocations(calls, chunks, warmup)
+
+
+def time_follower(follower, chunks=1000):
+    """
+    Time the envelope follower on noise shaped like PyAudio input
+
+    Args:
+        follower (EnvelopeFollower):
+        chunks (int): Number of chunks to time
+
+    Returns: float, mean seconds spent per chunk
+    """
+    in_data = _noise_chunks(follower.chunk_size, chunks)
+    start = time.perf_counter()
+    for chunk in in_data:
+        follower.process(chunk)
+    return (time.perf_counter() - start) / chunks
+
+
+def chunk_times(bank, chunks=200, warmup=10):
+    """
+    Time every chunk a bank renders after warm-up
+
+    Args:
+        bank (OscillatorBank):
+        chunks (int): Number of chunks to time
+        warmup (int): Number of chunks rendered before timing
+
+    Returns: ndarray of float, seconds spent on each chunk
+    """
+    for i in range(warmup):
+        bank.next_chunk()
+    times = numpy.zeros(chunks)
+    for i in range(chunks):
+        start = time.perf_counter()
+        bank.next_chunk()
+        times[i] = time.perf_counter() - start
+    return times
+
+
+def voices_fit(voice_count, chunk_size, load=50, percentile=95, chunks=200):
+    """
+    Check whether a bank of voice_count voices renders within budget
+
+    Args:
+        voice_count (int):
+        chunk_size (int):
+        load (float): Percent of the deadline a chunk may take
+        percentile (float): Percentile of chunk times held to the budget
+        chunks (int): Number of chunks to time
+
+    Returns: bool
+    """
+    octaves = range(-2, 2)
+    unison = max(1, -(-voice_count // (len(frequency_map) * len(octaves))))
+    frequencies = chord_frequencies(sorted(frequency_map), octaves,
+                                    unison, detune=20)[:voice_count]
+    bank = build_bank(SAMPLE_RATE, chunk_size, start_mode='ON',
+                      frequencies=frequencies,
+                      amp_factors=1 / voice_count)
+    times = chunk_times(bank, chunks)
+    deadline = chunk_size / SAMPLE_RATE
+    return numpy.percentile(times, percentile) <= deadline * load / 100
+
+
+def max_voices(chunk_size, load=50, percentile=95, chunks=200):
+    """
+    Find roughly the most voices that render within budget
+
+    The voice count is doubled until it no longer fits, then narrowed
+    down by bisection to within 5%.
+
+    Args:
+        chunk_size (int):
+        load (float): Percent of the deadline a chunk may take
+        percentile (float): Percentile of chunk times held to the budget
+        chunks (int): Number of chunks to time per trial
+
+    Returns: int, 0 if not even one voice fits
+    """
+    low, high = 0, 1
+    while voices_fit(high, chunk_size, load, percentile, chunks):
+        low, high = high, high * 2
+    while high - low > max(1, low // 20):
+        middle = (low + high) // 2
+        if voices_fit(middle, chunk_size, load, percentile, chunks):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Measure the drone synthesis path.')
+    subparsers = parser.add_subparsers(dest='command')
+    allocations_parser = subparsers.add_parser(
+        'allocations', help='memory allocated per chunk after warm-up')
+    allocations_parser.add_argument('--chunks', type=int, default=1000)
+    allocations_parser.add_argument('--chunk-size', type=int,
+                                    default=CHUNK_SIZE)
+    follower_parser = subparsers.add_parser(
+        'follower', help='time the input envelope follower per chunk')
+    follower_parser.add_argument('--chunks', type=int, default=1000)
+    follower_parser.add_argument('--chunk-size', type=int,
+                                 default=CHUNK_SIZE)
+    follower_parser.add_argument('--mode', choices=('rms', 'peak'),
+                                 default='rms')
+    voices_parser = subparsers.add_parser(
+        'voices', help='most voices that fit in the callback budget')
+    voices_parser.add_argument('--chunk-sizes', type=int, nargs='+',
+                               default=[256, 512, 1024, 2048])
+    voices_parser.add_argument('--load', type=float, default=50,
+                               help='percent of the deadline a chunk may '
+                                    'take (default %(default)s)')
+    voices_parser.add_argument('--percentile', type=float, default=95,
+                               help='percentile of chunk times held to the '
+                                    'budget (default %(default)s)')
+    voices_parser.add_argument('--chunks', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == 'allocations':
+        bank = build_bank(SAMPLE_RATE, args.chunk_size, start_mode='ON')
+        sizes = measure_allocations(bank, args.chunks)
+        allocating = [size for size in sizes if size]
+        print('{0} of {1} callbacks allocated memory, worst {2} bytes'.format(
+            len(allocating), len(sizes), max(sizes)))
+    elif args.command == 'follower':
+        follower = EnvelopeFollower(SAMPLE_RATE, args.chunk_size,
+                                    mode=args.mode)
+        seconds = time_follower(follower, args.chunks)
+        deadline = args.chunk_size / SAMPLE_RATE
+        print('{0:.1f} us per chunk, {1:.2f}% of the callback deadline'.format(
+            seconds * 1e6, 100 * seconds / deadline))
+        sizes = measure_follower_allocations(follower, args.chunks)
+        allocating = [size for size in sizes if size]
+        print('{0} of {1} chunks allocated memory, worst {2} bytes'.format(
+            len(allocating), len(sizes), max(sizes)))
+    elif args.command == 'voices':
+        print('Most voices with the {0}th percentile chunk under {1}% of '
+              'its deadline:'.format(args.percentile, args.load))
+        for chunk_size in args.chunk_sizes:
+            print('  chunk size {0:5d} ({1:5.1f} ms): {2} voices'.format(
+                chunk_size, 1000 * chunk_size / SAMPLE_RATE,
+                max_voices(chunk_size, args.load, args.percentile,
+                           args.chunks)))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+"""
+The realtime audio callback, importable without a sound card.
+"""
+
+
+def make_callback(bank, follower, commands, monitor, continue_flag=0):
+    """
+    Build the PyAudio stream callback that plays bank
+
+    Each call drains the commands queued for the bank, follows the input
+    level, renders one chunk and records how long all of it took.
+
+    Args:
+        bank (synth.OscillatorBank):
+        follower (follower.EnvelopeFollower): Follows the input stream
+        commands (commands.CommandQueue): Changes to the bank from other
+            threads
+        monitor (monitor.CallbackMonitor):
+        continue_flag (int): Returned alongside each chunk, pyaudio's
+            paContinue
+
+    Returns: function (in_data, frame_count, time_info, status) suitable
+        as pyaudio.Stream's stream_callback
+    """
+    def main_callback(in_data, frame_count, time_info, status):
+        monitor.start()
+        commands.drain(bank.samples_played)
+        # Get amplitude of input
+        bank.input_level = follower.process(in_data)
+        new_chunk = bank.next_chunk(bank.chunk_size)
+        monitor.stop(status)
+        # Play sound. PyAudio reads the float32 array through the buffer
+        # protocol, so the bank's output buffer is handed over without a copy
+        return new_chunk, continue_flag
+
+    return main_callback
@@ -1,13 +1,38 @@
 #!/usr/bin/env python
 
+import bisect
+import codecs
+import collections
+import functools
+import gc
+import hashlib
+import io
+import locale
+import mmap
+import os
+import re
+import struct
+import zipfile
 from random import uniform
 
+import numpy
+
 from .rand import *
 from . import nodes
 
+# Version of the files written by Network.save(), raised whenever their layout changes
+FORMAT_VERSION = 1
+# Node classes Network.save() can write, which need nothing but a name to be rebuilt. Their position here is what
+# the files store, so new classes go at the end
+_saved_node_types = (nodes.Node, nodes.Word, nodes.Punctuation, nodes.Value, nodes.Action, nodes.BlankLine)
+
 
 class Network:
-    def __init__(self, name=None):
+    def __init__(self, name=None, rng=None):
+        """
+        :param name: str
+        :param rng: instance of chance.rand.RandomStream used to pick nodes, or None for the global random module
+        """
         self.node_list = []
         self.source = None
         self.output_node_sequence = []
@@ -16,6 +41,16 @@ class Network:
         self.previous_node = None
         self.input_sequence = []
         self._allow_self_links = True
+        self.rng = rng
+        # Link distributions of nodes visited during a walk, keyed by node
+        self._link_distributions = None
+        # CompiledNetwork made by compile(), dropped whenever the network changes
+        self.compiled = None
+        # Changes to the links and use weights of the nodes self.compiled was made from
+        self._changes = nodes.ChangeCounter()
+        # Name to the first node in node_list with that name
+        self._nodes_by_name = {}
+        self._indexed_count = 0
 
     def merge_nodes(self, keep_node, kill_node):
         """
@@ -27,18 +62,11 @@ class Network:
         """
         assert isinstance(keep_node, nodes.Node)
         assert isinstance(kill_node, nodes.Node)
-        merge_index = 0
+        self.compiled = None
         for kill_link in kill_node.link_list:
-            duplicate_found = False
-            i = 0
-            while i < len(keep_node.link_list):
-                if str(kill_link.target) == str(keep_node.link_list[i].target):
-                    duplicate_found = True
-                    merge_index = i
-                    break
-                i += 1
-            if duplicate_found:
-                keep_node.link_list[merge_index].weight += kill_link.weight
+            keep_link = keep_node.find_link(kill_link.target)
+            if keep_link:
+                keep_link.weight += kill_link.weight
             else:
                 keep_node.add_link(kill_link.target, kill_link.weight)
 
@@ -52,44 +80,62 @@ class Network:
             add_list = [node]
         else:
             add_list = node
+        self.compiled = None
 
+        nodes_by_name = self._name_index()
         for add_node in add_list:
-            if self._allow_self_links:
+            currently_existing_node = nodes_by_name.get(add_node.name)
+            if self._allow_self_links or currently_existing_node is None:
                 self.node_list.append(add_node)
+                nodes_by_name.setdefault(add_node.name, add_node)
             else:
-                for currently_existing_node in self.node_list:
-                    if currently_existing_node.name == add_node.name:
-                        self.merge_nodes(currently_existing_node, add_node)
-                        break
-                else:
-                    self.node_list.append(add_node)
+                self.merge_nodes(currently_existing_node, add_node)
+        self._indexed_count = len(self.node_list)
 
-    def feather_links(self, factor=0.01, include_self=False):
+    def feather_links(self, factor=0.01, include_self=False, block_size=1 << 22):
         """
         Goes through every node in the network and adds their linked nodes' links multiplied by given factor
+        Every node is feathered from the links the network had beforehand, so the result is W + factor * A W, where W
+        holds the link weights from node to node and A counts the links from node to node. That product is taken
+        over the network's compressed sparse row arrays and then written back to the links. Links to nodes which
+        were not linked yet are added after the existing ones, in the order they are first reached.
         :param factor: multiplier of neighbor links
-        :param include_self: Bool, determines if nodes can be feathered to themselves
+        :param include_self: Bool, determines if nodes can be feathered to themselves, that is, through links to nodes
+                             with their own name
+        :param block_size: int, most links reached through other nodes that are summed at once, bounding the memory
+                           used
         :return: None
         """
-        # TODO: it seems feather_links() is broken, probably has to do with instance copying and such...
-        copy_node_list = []
-        # For every node in the network...
-        for center_node in self.node_list:
-            # Get every node the center_node is linked to...
-            for branch_node in center_node.link_list:
-                # If include_self is set to True, make sure to pass over branch_nodes which are the node itself
-                if (not include_self) and (branch_node.target.name == center_node.name):
-                    continue
-                # Copy the branch node
-                c_node = copy.deepcopy(branch_node.target)
-                # Multiply all of its link weights by given factor
-                for c_node_link in c_node.link_list:
-                    c_node_link.weight *= factor
-                # Append the copied node to copy_node_list
-                copy_node_list.append(c_node)
-            for new_node in copy_node_list:
-                self.merge_nodes(center_node, new_node)
-            copy_node_list = []
+        self.compiled = None
+        compiled = CompiledNetwork(self)
+        links = [link for node in compiled.nodes for link in node.link_list]
+        if not links:
+            return
+        node_count = len(compiled)
+        row_starts = compiled.row_starts
+        targets = compiled.targets
+        weights = numpy.array([link.weight for link in links], dtype=float)
+        sources = numpy.repeat(numpy.arange(node_count), numpy.diff(row_starts))
+        # Nodes in node_list are feathered through each of their links, those only reachable through links are not
+        branches = numpy.flatnonzero(sources < len(self.node_list))
+        if not include_self:
+            name_ids = {}
+            ids = numpy.array([name_ids.setdefault(node.name, len(name_ids)) for node in compiled.nodes])
+            branches = branches[ids[sources[branches]] != ids[targets[branches]]]
+        keys, sums, firsts = _feathered_links(row_starts, targets, weights * factor, sources, branches, node_count,
+                                              block_size)
+
+        # Add to the first existing link to each target, as merge_nodes would
+        existing_keys, existing_firsts = numpy.unique(sources * node_count + targets, return_index=True)
+        found = numpy.minimum(numpy.searchsorted(existing_keys, keys), len(existing_keys) - 1)
+        is_existing = existing_keys[found] == keys
+        for position, weight in zip(existing_firsts[found[is_existing]].tolist(), sums[is_existing].tolist()):
+            links[position].weight += weight
+        order = numpy.argsort(firsts[~is_existing], kind='stable')
+        new_keys = keys[~is_existing][order]
+        for source, target, weight in zip((new_keys // node_count).tolist(), (new_keys % node_count).tolist(),
+                                          sums[~is_existing][order].tolist()):
+            compiled.nodes[source].add_link(compiled.nodes[target], weight)
 
     def apply_noise(self, max_factor=0.1):
         """
@@ -97,36 +143,124 @@ class Network:
         :param max_factor: float
         :return:
         """
-        # Some simple type handling
-        if isinstance(max_factor, int):
-            max_factor *= 1.0
-        # Main node loop
-        for node in self.node_list:
-            for link in node.link_list:
-                link.weight += round(random.uniform(0, link.weight * max_factor), 3)
+        self.transform_links(noise=max_factor)
+
+    def transform_links(self, scale=None, power=None, noise=None, minimum=None, maximum=None, threshold=None):
+        """
+        Changes the weights of the links of every node in node_list together, in one pass over a flat array of them
+        Whichever transforms are given apply in this order:
+            - scale: multiply every weight by scale
+            - power: raise every positive weight to power, which sharpens the differences between weights above 1
+                     and flattens them below 1, as sampling at a temperature of 1 / power would
+            - noise: add a random amount between 0 and weight * noise to every weight, rounded to 3 places
+            - minimum, maximum: clamp every weight to at least minimum and at most maximum
+            - threshold: set every weight below threshold to 0, keeping the link
+        If the network is compiled, self.compiled gets the new weights instead of being dropped.
+        :return: None
+        """
+        links, count = self._flat_links()
+        weights = numpy.array([link.weight for link in links[:count]], dtype=float)
+        if scale is not None:
+            weights *= scale
+        if power is not None:
+            positive = weights > 0
+            weights[positive] **= power
+        if noise is not None:
+            weights += numpy.round(as_stream(self.rng).random(count) * (weights * noise), 3)
+        if minimum is not None or maximum is not None:
+            numpy.clip(weights, minimum, maximum, out=weights)
+        if threshold is not None:
+            weights[weights < threshold] = 0
+        self._write_link_weights(links, count, weights)
+
+    def link_weights(self):
+        """
+        :return: numpy array of the weight of every link of every node in node_list, in order, for transforms
+                 transform_links() doesn't offer, to be written back with set_link_weights()
+        """
+        links, count = self._flat_links()
+        return numpy.array([link.weight for link in links[:count]], dtype=float)
+
+    def set_link_weights(self, weights):
+        """
+        Sets the weight of every link of every node in node_list, updating self.compiled if the network is compiled
+        :param weights: sequence of weights in the order of link_weights()
+        """
+        links, count = self._flat_links()
+        weights = numpy.asarray(weights, dtype=float)
+        if weights.shape != (count,):
+            raise ValueError("Need %d link weights, got %s" % (count, weights.shape))
+        self._write_link_weights(links, count, weights)
+
+    def _flat_links(self):
+        """
+        :return: tuple of (list of every link of every node in node_list in order, followed by the links of any nodes
+                 self.compiled indexes beyond them, int number of links belonging to nodes in node_list)
+        """
+        compiled = self._current_compiled()
+        if compiled is not None:
+            links = [link for node in compiled.nodes for link in node.link_list]
+            if len(links) == len(compiled.targets):
+                return links, int(compiled.row_starts[len(self.node_list)])
+            # A link_list was changed directly
+            self.compiled = None
+        links = [link for node in self.node_list for link in node.link_list]
+        return links, len(links)
+
+    def _write_link_weights(self, links, count, weights):
+        for link, weight in zip(links, weights.tolist()):
+            link.weight = weight
+        if self.compiled is not None:
+            unlisted_weights = [link.weight for link in links[count:]]
+            self.compiled = self.compiled.reweighted(numpy.concatenate((weights, unlisted_weights)))
+            # These changes are the compiled weights, so they don't make it out of date
+            self.compiled.changes = self._changes.count
 
     def refresh_links(self, copy_network):
         # Is this necessary???
         # Finds every duplicate node from self and copy_network, and replaces links in duplicate nodes
+        self.compiled = None
         for copy_node in copy_network.node_list:
             for keep_node in self.node_list:
                 if copy_node.name == keep_node.name:
                     keep_node.link_list = copy_node.link_list
 
-    def find_node_by_name(self, name):
+    def _name_index(self):
+        """
+        :return: dict of every name in node_list to the first node with that name
+        """
+        # Catch nodes appended to or removed from node_list directly
+        if self._indexed_count != len(self.node_list):
+            self.reindex()
+        return self._nodes_by_name
+
+    def reindex(self):
+        """
+        Rebuilds the name index used by find_node_by_name, has_node_with_name and add_nodes
+        Needed only after changing node_list or the names of its nodes without going through Network methods
+        """
+        self._nodes_by_name = {}
         for node in self.node_list:
-            if node.name == name:
-                return node
-        else:
+            self._nodes_by_name.setdefault(node.name, node)
+        self._indexed_count = len(self.node_list)
+
+    def find_node_by_name(self, name):
+        node = self._name_index().get(name)
+        if node is None:
             raise ValueError('Could not find node by name ' + str(name))
+        return node
 
     def remove_node_by_name(self, name):
         """
         Deletes a node by a given name and all network links pointing to it
         :param name: str
         """
+        self.compiled = None
+        nodes_by_name = self._name_index()
         # Remove the node from self.node_list
         self.node_list[:] = [node for node in self.node_list if (not node.name == name)]
+        nodes_by_name.pop(name, None)
+        self._indexed_count = len(self.node_list)
         # Look through every link in the network, removing all references to the newly removed node
         for node in self.node_list:
             node.link_list[:] = [link for link in node.link_list if (not link.target_name == name)]
@@ -137,18 +271,121 @@ class Network:
         :param name: str or int
         :return: Bool
         """
-        for node in self.node_list:
-            if node.name == name:
-                return True
-        else:
-            return False
+        return name in self._name_index()
+
+    def compile(self):
+        """
+        Prepares the network for fast picking and walking, see CompiledNetwork
+        The result is kept in self.compiled and used by pick() and walk() until the network is changed through one of
+        its methods, or the links or use weight of one of its nodes change through Node and Link (see
+        nodes.ChangeCounter). Call compile() again after appending to or replacing a link_list directly.
+        :return: instance of CompiledNetwork
+        """
+        self.compiled = CompiledNetwork(self)
+        return self.compiled
+
+    def _current_compiled(self):
+        """
+        :return: self.compiled, or None if there is none or it has been dropped because nodes changed since compiling
+        """
+        compiled = self.compiled
+        if compiled is not None and compiled.changes != self._changes.count:
+            self.compiled = None
+            return None
+        return compiled
+
+    def save(self, path):
+        """
+        Writes the network to an uncompressed .npz file, which load() maps into memory instead of reading
+        Stored are the name, class, self_destruct flag and use weight of every node, its links in the compressed
+        sparse row arrays of CompiledNetwork, and the file format version. Only nodes with str names and a class
+        that needs nothing else to be rebuilt can be saved (Node, Word, Punctuation, Value, Action and BlankLine).
+        :param path: str, path of the file to write
+        """
+        # Compiled afresh rather than trusting self.compiled, which may not show links changed directly
+        compiled = CompiledNetwork(self)
+        type_codes = dict((node_type, code) for code, node_type in enumerate(_saved_node_types))
+        names = []
+        codes = []
+        for node in compiled.nodes:
+            if type(node) not in type_codes:
+                raise TypeError('Cannot save nodes of type ' + type(node).__name__)
+            if not isinstance(node.name, str):
+                raise TypeError('Cannot save node names which are not str, such as ' + repr(node.name))
+            names.append(node.name)
+            codes.append(type_codes[type(node)])
+        weights = [link.weight for node in compiled.nodes for link in node.link_list]
+        use_weights = [node.use_weight for node in compiled.nodes]
+        arrays = compiled.arrays()
+        arrays.update(format_version=numpy.array(FORMAT_VERSION),
+                      listed_count=numpy.array(len(self.node_list)),
+                      names=numpy.frombuffer(''.join(names).encode('utf-8'), dtype=numpy.uint8),
+                      name_ends=numpy.cumsum([len(name) for name in names], dtype=numpy.int64),
+                      node_types=numpy.array(codes, dtype=numpy.uint8),
+                      self_destruct=numpy.array([node.self_destruct for node in compiled.nodes], dtype=bool),
+                      use_weights=self._number_array(use_weights),
+                      weights=self._number_array(weights))
+        _save_npz(path, arrays)
+
+    @staticmethod
+    def _number_array(values):
+        # Int weights stay ints, so a loaded network has the same weights as the one saved
+        if all(isinstance(value, int) for value in values):
+            return numpy.array(values, dtype=numpy.int64)
+        return numpy.array(values, dtype=float)
+
+    @classmethod
+    def load(cls, path, rng=None):
+        """
+        Reads a network written by save()
+        The file is memory mapped, and the returned network comes already compiled around the mapped arrays.
+        :param path: str, path of the .npz file
+        :param rng: instance of chance.rand.RandomStream for the network, see Network()
+        :return: instance of Network
+        """
+        arrays = _map_npz(path)
+        version = int(arrays['format_version'])
+        if version != FORMAT_VERSION:
+            raise ValueError('Cannot load network file format version %d, only version %d' % (version, FORMAT_VERSION))
+        # Everything made here is kept, so the garbage collector running over it again and again would free nothing
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            joined = bytes(arrays['names']).decode('utf-8')
+            name_starts = [0] + arrays['name_ends'].tolist()
+            network = cls(rng=rng)
+            node_list = []
+            rows = _LinkRows(node_list, arrays)
+            for i, (code, self_destruct, use_weight) in enumerate(zip(arrays['node_types'].tolist(),
+                                                                      arrays['self_destruct'].tolist(),
+                                                                      arrays['use_weights'].tolist())):
+                node = _saved_node_types[code](joined[name_starts[i]:name_starts[i + 1]])
+                node.self_destruct = self_destruct
+                node._use_weight = use_weight
+                # Picks and walks go through self.compiled, so links are only made for nodes that are looked at
+                del node.link_list
+                node._load_links = functools.partial(rows.links, i)
+                node._indexed_links = None
+                node._change_counters.append(network._changes)
+                node_list.append(node)
+            network.add_nodes(node_list[:int(arrays['listed_count'])])
+            network.compiled = CompiledNetwork.from_arrays(arrays, node_list)
+            network.compiled.changes = network._changes.count
+        finally:
+            if collecting:
+                gc.enable()
+        return network
 
     def pick_by_use_weight(self):
         """
         :return: Node instance
         """
         self.previous_node = self.current_node
-        node = weighted_rand(self.node_list, 'discreet')
+        compiled = self._current_compiled()
+        if compiled is not None:
+            self.current_node = compiled.nodes[compiled.pick_start_index(self.rng)]
+            return self.current_node
+        node = DiscreteDistribution(self.node_list).draw(self.rng)
         self.current_node = self.find_node_by_name(node)
         return self.current_node
 
@@ -173,18 +410,604 @@ class Network:
             else:
                 return self.pick_by_use_weight()
         # Otherwise, use a discreet weighted random on start_node.link_list
-        self.current_node = weighted_rand([(link.target, link.weight) for link in current_node.link_list], 'discreet')
+        self.current_node = self._next_node(current_node, self._link_distributions)
         return self.current_node
 
+    def _next_node(self, current_node, link_distributions=None):
+        """
+        Picks the node following current_node from its links
+        :param current_node: Node instance
+        :param link_distributions: dict of nodes to their prepared link distributions, filled in as nodes are
+                                   visited, or None to prepare current_node's links from scratch
+        :return: Node instance
+        """
+        compiled = self._current_compiled()
+        if compiled is not None and current_node in compiled.indices:
+            index = compiled.pick_index(compiled.indices[current_node], self.rng)
+            return compiled.nodes[index]
+        if link_distributions is None:
+            distribution = current_node.link_distribution()
+        else:
+            # During a walk, each node's links are prepared once, the first time it is visited
+            distribution = link_distributions.get(current_node)
+            if distribution is None:
+                distribution = current_node.link_distribution()
+                link_distributions[current_node] = distribution
+        return distribution.draw(self.rng)
+
     def walk(self, steps):
         """
         Populates self.output_node_sequence by walking along the network, picking from node to node
+        Links must not be changed while walking, since each node's links are only prepared once per walk
+        If the network has been compiled, the whole walk runs over node indices in self.compiled
         :param steps: int, how many nodes to pick
         """
         assert self.node_list != []
-        for i in range(steps):
-            self.output_node_sequence.append(self.pick())
+        compiled = self._current_compiled()
+        if steps > 0 and compiled is not None and (self.current_node is None or
+                                                    self.current_node in compiled.indices):
+            if self.current_node is None:
+                start = None
+            else:
+                start = compiled.indices[self.current_node]
+            walked = compiled.nodes_at(compiled.walk(steps, start, self.rng))
+            self.output_node_sequence.extend(walked)
+            self.previous_node = walked[-2] if len(walked) > 1 else self.current_node
+            self.current_node = walked[-1]
+            return
+        self._link_distributions = {}
+        try:
+            for i in range(steps):
+                self.output_node_sequence.append(self.pick())
+        finally:
+            self._link_distributions = None
 
+    def iter_walk(self, steps=None, as_values=True):
+        """
+        Walks along the network like walk(), but yields each node as it is picked instead of keeping it in
+        self.output_node_sequence, so a walk of any length takes constant memory
+        self.current_node and self.previous_node follow the walk as it goes
+        :param steps: int, how many nodes to pick, or None to walk until the caller stops
+        :param as_values: Bool, yield each node's get_value() if True, or the node itself if False
+        :return: generator
+        """
+        assert self.node_list != []
+        # Kept by the generator rather than the network, so an abandoned walk leaves nothing behind
+        link_distributions = {}
+        picked = 0
+        while steps is None or picked < steps:
+            self.previous_node = self.current_node
+            if self.current_node is None:
+                node = self.pick_by_use_weight()
+            else:
+                node = self._next_node(self.current_node, link_distributions)
+                self.current_node = node
+            picked += 1
+            if as_values:
+                yield node.get_value()
+            else:
+                yield node
+
+    def walk_chains(self, chains, steps, as_values=False):
+        """
+        Walks several independent chains through the network at once, for example one per instrument
+        The network is compiled first if it hasn't been or has changed since, and every step advances all chains
+        together. Each chain starts with a node picked by use weight. self.current_node and self.output_node_sequence
+        are left alone.
+        :param chains: int, how many chains to walk
+        :param steps: int, how many nodes to pick in each chain
+        :param as_values: Bool, return each node's get_value() if True, or the node itself if False
+        :return: list of chains lists of steps nodes (or values)
+        """
+        assert self.node_list != []
+        compiled = self._current_compiled()
+        if compiled is None:
+            compiled = self.compile()
+        walked = compiled.walk_chains(chains, steps, rng=self.rng)
+        if as_values:
+            return [compiled.values_at(chain) for chain in walked.tolist()]
+        return [compiled.nodes_at(chain) for chain in walked.tolist()]
+
+
+class _LinkRows:
+    """
+    Makes the link lists of nodes read by Network.load() out of the mapped arrays, one node at a time
+    """
+    def __init__(self, node_list, arrays):
+        """
+        :param node_list: list of every node in the file, by index
+        :param arrays: dict of the mapped arrays
+        """
+        self.node_list = node_list
+        self.row_starts = arrays['row_starts']
+        self.targets = arrays['targets']
+        self.weights = arrays['weights']
+
+    def links(self, index):
+        """
+        :param index: int, index of the node in node_list
+        :return: list of Link instances for the links of that node
+        """
+        start, end = int(self.row_starts[index]), int(self.row_starts[index + 1])
+        node_list = self.node_list
+        source = node_list[index]
+        return [nodes.Link(node_list[target], weight, source)
+                for target, weight in zip(self.targets[start:end].tolist(), self.weights[start:end].tolist())]
+
+
+class CompiledNetwork:
+    """
+    An immutable snapshot of a Network's links in compressed sparse row form, for fast picking and walking.
+
+    Every node gets an index. The links of node i are entries row_starts[i] to row_starts[i + 1] of targets (the
+    index of each link's target) and cumulative (the running total of link weights within the row), so picking the
+    next node is a bisect over one row. Walks run entirely over indices and are only mapped back to nodes at the end.
+
+    Nodes reachable through links but missing from node_list are indexed too, after the nodes of node_list.
+
+    The arrays alone describe every link, so they can be handed to other processes (see chance.parallel) and a
+    CompiledNetwork rebuilt around them with from_arrays().
+    """
+    # Names of the arrays returned by arrays()
+    ARRAY_NAMES = ('row_starts', 'targets', 'cumulative', 'link_cumulative', 'start_indices_array',
+                   'start_cumulative')
+
+    def __init__(self, network):
+        """
+        :param network: instance of Network
+        """
+        # Changes to the network's nodes counted up to now, see Network._current_compiled()
+        self.changes = network._changes.count
+        self.nodes = list(network.node_list)
+        # Node to index. Nodes compare by identity, so equal names still get separate indices
+        self.indices = {}
+        for node in self.nodes:
+            self.indices.setdefault(node, len(self.indices))
+        if len(self.indices) != len(self.nodes):
+            raise ValueError("A node appears more than once in node_list")
+        starting_count = len(self.nodes)
+
+        row_starts = [0]
+        targets = []
+        weights = []
+        cumulative = []
+        i = 0
+        # self.nodes grows while looping as unlisted link targets are found
+        while i < len(self.nodes):
+            total = 0
+            for link in self.nodes[i].link_list:
+                target_index = self.indices.get(link.target)
+                if target_index is None:
+                    target_index = len(self.nodes)
+                    self.indices[link.target] = target_index
+                    self.nodes.append(link.target)
+                targets.append(target_index)
+                weights.append(link.weight)
+                total += link.weight
+                cumulative.append(total)
+            row_starts.append(len(targets))
+            i += 1
+        for node in self.nodes:
+            if network._changes not in node._change_counters:
+                node._change_counters.append(network._changes)
+
+        # Starting nodes are picked by use weight, then mapped to the first node with the same name, as
+        # Network.pick_by_use_weight does
+        first_by_name = {}
+        self.start_indices = []
+        start_cumulative = []
+        total = 0
+        for index, node in enumerate(self.nodes[:starting_count]):
+            self.start_indices.append(first_by_name.setdefault(node.name, index))
+            total += node.use_weight
+            start_cumulative.append(total)
+
+        # Python lists for scalar picks, which bisect faster than numpy arrays
+        self._row_starts = row_starts
+        self._targets = targets
+        self._cumulative = cumulative
+        self._start_cumulative = start_cumulative
+        self.row_starts = self._frozen(row_starts, numpy.intp)
+        self.targets = self._frozen(targets, numpy.intp)
+        self.cumulative = self._frozen(cumulative, float)
+        # Running total of every link weight across all rows, so a batch of picks from different rows can share one
+        # searchsorted
+        self.link_cumulative = self._frozen(numpy.cumsum(numpy.array(weights, dtype=float)), float)
+        self.start_indices_array = self._frozen(self.start_indices, numpy.intp)
+        self.start_cumulative = self._frozen(start_cumulative, float)
+
+    @staticmethod
+    def _frozen(values, dtype):
+        array = numpy.array(values, dtype=dtype)
+        array.setflags(write=False)
+        return array
+
+    def arrays(self):
+        """
+        :return: dict of each name in ARRAY_NAMES to its numpy array
+        """
+        return dict((name, getattr(self, name)) for name in self.ARRAY_NAMES)
+
+    @classmethod
+    def from_arrays(cls, arrays, nodes=None):
+        """
+        Rebuilds a CompiledNetwork from the arrays of another, without copying them
+        Picks and walks read the arrays through memoryviews, so arrays may live in shared or memory mapped buffers.
+        :param arrays: dict of each name in ARRAY_NAMES to a one dimensional, contiguous numpy array
+        :param nodes: list of Node instances, one for each node index, or None if only indices are needed
+        :return: instance of CompiledNetwork
+        """
+        compiled = cls.__new__(cls)
+        # Set by whoever hands it to a Network, see Network.load()
+        compiled.changes = None
+        compiled.nodes = nodes
+        compiled.indices = {}
+        if nodes is not None:
+            for index, node in enumerate(nodes):
+                compiled.indices[node] = index
+        for name in cls.ARRAY_NAMES:
+            setattr(compiled, name, arrays[name])
+        compiled.start_indices = memoryview(compiled.start_indices_array)
+        compiled._row_starts = memoryview(compiled.row_starts)
+        compiled._targets = memoryview(compiled.targets)
+        compiled._cumulative = memoryview(compiled.cumulative)
+        compiled._start_cumulative = memoryview(compiled.start_cumulative)
+        return compiled
+
+    def reweighted(self, weights):
+        """
+        :param weights: sequence of the new weight of every link, in the order of targets
+        :return: CompiledNetwork with the same nodes and links as this one, but the given link weights
+        """
+        weights = numpy.asarray(weights, dtype=float)
+        if weights.shape != self.targets.shape:
+            raise ValueError("Need one weight per link")
+        compiled = copy.copy(self)
+        link_cumulative = numpy.cumsum(weights)
+        # Running totals within each row are the running total across all rows, less the total before the row
+        before_rows = numpy.concatenate(([0.0], link_cumulative))[self.row_starts[:-1]]
+        cumulative = link_cumulative - numpy.repeat(before_rows, numpy.diff(self.row_starts))
+        compiled._cumulative = cumulative.tolist()
+        compiled.cumulative = self._frozen(cumulative, float)
+        compiled.link_cumulative = self._frozen(link_cumulative, float)
+        return compiled
+
+    def _describe(self, index):
+        """
+        :return: str naming the node at index, for error messages
+        """
+        if self.nodes is None:
+            return "at index %d" % index
+        return str(self.nodes[index].name)
+
+    def __len__(self):
+        return len(self.row_starts) - 1
+
+    def pick_start_index(self, rng=None):
+        """
+        Picks a starting node by use weight
+        :param rng: RandomStream, or None for the global random module
+        :return: int, node index
+        """
+        if not self._start_cumulative:
+            raise ValueError("Cannot pick from a network with no nodes")
+        total = self._start_cumulative[-1]
+        if total <= 0:
+            return self.start_indices[0]
+        i = bisect.bisect_right(self._start_cumulative, as_stream(rng).random() * total)
+        return self.start_indices[min(i, len(self.start_indices) - 1)]
+
+    def pick_index(self, index, rng=None):
+        """
+        Picks the node following the node at index
+        :param index: int, node index
+        :param rng: RandomStream, or None for the global random module
+        :return: int, node index
+        """
+        start = self._row_starts[index]
+        stop = self._row_starts[index + 1]
+        if start == stop:
+            raise ValueError("Node %s has no links to pick from" % self._describe(index))
+        total = self._cumulative[stop - 1]
+        if total <= 0:
+            return self._targets[start]
+        i = bisect.bisect_right(self._cumulative, as_stream(rng).random() * total, start, stop)
+        return self._targets[min(i, stop - 1)]
+
+    def walk(self, steps, start=None, rng=None):
+        """
+        Walks the network for a number of steps
+        :param steps: int, how many nodes to pick
+        :param start: int, index of the node to walk from, or None to begin by picking a node by use weight
+        :param rng: RandomStream, or None for the global random module
+        :return: list of steps node indices
+        """
+        draw = as_stream(rng).random
+        row_starts = self._row_starts
+        targets = self._targets
+        cumulative = self._cumulative
+        walked = []
+        index = start
+        if index is None and steps > 0:
+            index = self.pick_start_index(rng)
+            walked.append(index)
+        while len(walked) < steps:
+            row_start = row_starts[index]
+            row_stop = row_starts[index + 1]
+            if row_start == row_stop:
+                raise ValueError("Node %s has no links to pick from" % self._describe(index))
+            total = cumulative[row_stop - 1]
+            if total <= 0:
+                index = targets[row_start]
+            else:
+                i = bisect.bisect_right(cumulative, draw() * total, row_start, row_stop)
+                index = targets[i if i < row_stop else row_stop - 1]
+            walked.append(index)
+        return walked
+
+    def walk_chains(self, chains, steps, starts=None, rng=None):
+        """
+        Walks several independent chains at once, each step picking the next node of every chain in one
+        vectorized operation
+        Link weights must not be negative.
+        :param chains: int, how many chains to walk
+        :param steps: int, how many nodes to pick in each chain
+        :param starts: sequence of chains node indices to walk from, or None to begin every chain by picking a node
+                       by use weight
+        :param rng: RandomStream, or None for numpy's global generator
+        :return: numpy array of shape (chains, steps) of node indices
+        """
+        stream = as_stream(rng)
+        walked = numpy.empty((chains, steps), dtype=numpy.intp)
+        if steps <= 0 or chains <= 0:
+            return walked
+        first_step = 0
+        if starts is None:
+            if not len(self.start_cumulative):
+                raise ValueError("Cannot pick from a network with no nodes")
+            total = self.start_cumulative[-1]
+            if total <= 0:
+                picks = numpy.zeros(chains, dtype=numpy.intp)
+            else:
+                picks = numpy.searchsorted(self.start_cumulative, stream.random(chains) * total, side='right')
+                numpy.minimum(picks, len(self.start_cumulative) - 1, out=picks)
+            indices = self.start_indices_array[picks]
+            walked[:, 0] = indices
+            first_step = 1
+        else:
+            indices = numpy.array(starts, dtype=numpy.intp)
+            if indices.shape != (chains,):
+                raise ValueError("Need one start index per chain")
+
+        row_starts = self.row_starts
+        link_cumulative = self.link_cumulative
+        for step in range(first_step, steps):
+            row_start = row_starts[indices]
+            row_stop = row_starts[indices + 1]
+            if (row_start == row_stop).any():
+                dead_end = indices[row_start == row_stop][0]
+                raise ValueError("Node %s has no links to pick from" % self._describe(dead_end))
+            # Total weight before each row, and within it
+            base = numpy.where(row_start > 0, link_cumulative[row_start - 1], 0)
+            totals = link_cumulative[row_stop - 1] - base
+            links = numpy.searchsorted(link_cumulative, base + stream.random(chains) * totals, side='right')
+            # Keep rounding from landing outside the row, and pick the first link of rows with no weight, as
+            # pick_index does
+            numpy.clip(links, row_start, row_stop - 1, out=links)
+            links = numpy.where(totals > 0, links, row_start)
+            indices = self.targets[links]
+            walked[:, step] = indices
+        return walked
+
+    def nodes_at(self, indices):
+        """
+        :param indices: iterable of node indices
+        :return: list of Node instances
+        """
+        nodes_list = self.nodes
+        return [nodes_list[i] for i in indices]
+
+    def values_at(self, indices):
+        """
+        :param indices: iterable of node indices
+        :return: list of the value of each node, from Node.get_value()
+        """
+        nodes_list = self.nodes
+        return [nodes_list[i].get_value() for i in indices]
+
+
+def _feathered_links(row_starts, targets, weights, sources, branches, node_count, block_size=1 << 22):
+    """
+    Sums, for every link chosen as a branch, the weights of its target's links into links from its source
+    The links reached through the branches are expanded block_size at a time, to bound the memory used.
+    :param row_starts: row_starts array of a CompiledNetwork
+    :param targets: targets array of a CompiledNetwork
+    :param weights: array of the weight added for each link
+    :param sources: array of the source node index of each link
+    :param branches: array of link positions, in order
+    :return: tuple of arrays (keys, sums, firsts) with one entry for each link reached: source * node_count + target,
+             the summed weight added to it, and the order it was first reached in
+    """
+    counts = row_starts[targets[branches] + 1] - row_starts[targets[branches]]
+    ends = numpy.cumsum(counts)
+    block_keys = []
+    block_sums = []
+    block_firsts = []
+    start = 0
+    while start < len(branches):
+        block_start = int(ends[start] - counts[start])
+        stop = max(start + 1, int(numpy.searchsorted(ends, block_start + block_size, side='right')))
+        block_counts = counts[start:stop]
+        total = int(ends[stop - 1]) - block_start
+        if total:
+            # The position of every link of every branch target, in turn
+            offsets = numpy.repeat(ends[start:stop] - block_counts - block_start, block_counts)
+            positions = (numpy.arange(total) - offsets +
+                         numpy.repeat(row_starts[targets[branches[start:stop]]], block_counts))
+            keys = numpy.repeat(sources[branches[start:stop]], block_counts) * node_count + targets[positions]
+            unique_keys, firsts, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+            block_keys.append(unique_keys)
+            block_sums.append(numpy.bincount(inverse.ravel(), weights[positions], len(unique_keys)))
+            block_firsts.append(firsts + block_start)
+        start = stop
+    if not block_keys:
+        return numpy.zeros(0, dtype=numpy.intp), numpy.zeros(0), numpy.zeros(0, dtype=numpy.intp)
+    if len(block_keys) == 1:
+        return block_keys[0], block_sums[0], block_firsts[0]
+    # A node's links can span two blocks, so sum the blocks together too. Blocks are in order, so the first entry
+    # for a key is the one reached first
+    keys, firsts, inverse = numpy.unique(numpy.concatenate(block_keys), return_index=True, return_inverse=True)
+    sums = numpy.bincount(inverse.ravel(), numpy.concatenate(block_sums), len(keys))
+    return keys, sums, numpy.concatenate(block_firsts)[firsts]
+
+
+def _save_npz(path, arrays):
+    """
+    Writes arrays to an uncompressed .npz file, with the data of every array aligned for mapping into memory
+    numpy.load() reads the file like any other .npz file. It is written under a temporary name and then renamed, so
+    no one loads a half written file, and networks still mapping an older file at path keep their own copy of it.
+    :param path: str
+    :param arrays: dict of array names to numpy arrays
+    """
+    temporary_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        with zipfile.ZipFile(temporary_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, array in arrays.items():
+                info = zipfile.ZipInfo(name + '.npy', date_time=(1980, 1, 1, 0, 0, 0))
+                zip64 = array.nbytes > zipfile.ZIP64_LIMIT // 2
+                # Pad the local header with an extra field (the ID zipalign uses) so the member's data, and with it
+                # the array after its 64 byte aligned .npy header, starts on a 64 byte boundary
+                header_length = 30 + len(info.filename.encode('utf-8')) + 4 + (20 if zip64 else 0)
+                padding = -(archive.fp.tell() + header_length) % 64
+                info.extra = struct.pack('<HH', 0xD935, padding) + bytes(padding)
+                with archive.open(info, 'w', force_zip64=zip64) as member:
+                    numpy.lib.format.write_array(member, numpy.asanyarray(array), allow_pickle=False)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def _map_npz(path):
+    """
+    Maps the arrays of an uncompressed .npz file into memory, without reading them
+    :param path: str
+    :return: dict of array names to read only numpy arrays
+    """
+    arrays = {}
+    with open(path, 'rb') as file, zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError('Cannot map compressed member %s of %s' % (info.filename, path))
+            # The member's data follows its local header, whose name and extra field lengths may differ from those
+            # in the central directory
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = numpy.frombuffer(file.read(4), dtype='<u2')
+            file.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            version = numpy.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = numpy.lib.format.read_array_header_2_0(file)
+            if dtype.hasobject:
+                raise ValueError('Cannot map member %s of %s, which holds Python objects' % (info.filename, path))
+            order = 'F' if fortran_order else 'C'
+            if numpy.prod(shape, dtype=numpy.int64) == 0:
+                array = numpy.empty(shape, dtype=dtype, order=order)
+                array.setflags(write=False)
+            else:
+                array = numpy.memmap(path, dtype=dtype, mode='r', offset=file.tell(), shape=shape, order=order)
+                # Files not written by _save_npz() may leave arrays unaligned, which memoryviews can't index
+                if not array.flags.aligned:
+                    array = numpy.array(array)
+                    array.setflags(write=False)
+            arrays[info.filename[:-len('.npy')]] = array
+    return arrays
+
+
+# Matches a word group, a run of word characters, or a character other than a space that ends a word
+_token_pattern = re.compile(r'<[^>]*>?|[^ ,.;!?:\-+<]+|[,.;!?:\-+]')
+# The node type made from each character that ends a word
+_separator_types = {',': nodes.Punctuation, '.': nodes.Punctuation, ';': nodes.Punctuation, '!': nodes.Punctuation,
+                    '?': nodes.Punctuation, ':': nodes.Punctuation, '-': nodes.Punctuation, '+': nodes.Action}
+
+
+def tokenize(text):
+    """
+    Splits text into the words, punctuation and actions that word_mine makes nodes of, in the order they appear
+    Spaces separate words without making a token. Anything between < and > is one word however it is spelled, and
+    if it ends with @ the @ is dropped and the word self-destructs after its first use. A word group left open runs
+    to the end of the text.
+    Text can be given in chunks split anywhere, even in the middle of a word or group, and only the unfinished word
+    at the end of each chunk is held back, so a whole file never needs to be in memory.
+    :param text: str, or iterable of str chunks of one text, such as from text_chunks()
+    :return: generator of (node class, name, self_destruct) tuples, where node class is nodes.Word,
+             nodes.Punctuation or nodes.Action
+    """
+    if isinstance(text, str):
+        text = (text,)
+    held = ''
+    for chunk in text:
+        tokens, held = _split_chunk(held + chunk)
+        yield from _token_tuples(tokens)
+    if held:
+        yield from _token_tuples(_token_pattern.findall(held))
+
+
+def _split_chunk(chunk):
+    """
+    :param chunk: str, part of a text
+    :return: tuple of (list of the tokens in chunk as matched by _token_pattern, str of the word or open group at the
+             end of chunk, which may continue in the next chunk)
+    """
+    tokens = _token_pattern.findall(chunk)
+    if tokens:
+        last = tokens[-1]
+        if last[0] == '<':
+            if len(last) == 1 or last[-1] != '>':
+                tokens.pop()
+                return tokens, last
+        elif last not in _separator_types and chunk[-1] != ' ':
+            tokens.pop()
+            return tokens, last
+    return tokens, ''
+
+
+def _token_tuples(tokens):
+    node_type_of = _separator_types.get
+    word_type = nodes.Word
+    for token in tokens:
+        if token[0] != '<':
+            yield node_type_of(token, word_type), token, False
+        else:
+            name = token[1:-1] if len(token) > 1 and token[-1] == '>' else token[1:]
+            if name[-1:] == '@':
+                if len(name) > 1:
+                    yield word_type, name[:-1], True
+            elif name:
+                yield word_type, name, False
+
+
+def text_chunks(path, chunk_size=1 << 20, encoding=None):
+    """
+    Reads a text file in chunks through a memory map, decoding it and translating line endings to \\n as reading it
+    with open() would
+    :param path: str, path to the file
+    :param chunk_size: int, number of bytes decoded at a time
+    :param encoding: str, defaults to the locale's preferred encoding, as for open()
+    :return: generator of str
+    """
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_size):
+                yield decoder.decode(mapped[start:start + chunk_size])
+    yield decoder.decode(b'', final=True)
 
 
 def word_mine(source, relationship_weights=None, allow_self_links=True, merge_same_words=False):
@@ -206,21 +1029,11 @@ def word_mine(source, relationship_weights=None, allow_self_links=True, merge_sa
     :return: instance of Network
     """
     # import docx
-    punctuation_list = [' ', ',', '.', ';', '!', '?', ':', "-"]
-    action_list = ['+']
     node_sequence = []
     network = Network()
 
     # Set up relative position weights
-    if relationship_weights is not None:
-        distance_weights = copy.copy(relationship_weights)
-    else:
-        distance_weights = {1: 1000, 2: 100, 3: 80, 4: 60, 5: 50,
-                            6: 40, 7: 30, 8: 17, 9: 14, 10: 10,
-                            11: 10, 12: 10, 13: 5, 14: 5, 15: 75}
-    for key, value in distance_weights.items():
-        if value <= 0:
-            del distance_weights[key]
+    distance_weights = _distance_weights(relationship_weights)
 
     # Open the source document with docx
     # read_doc = docx.Document(source)
@@ -229,65 +1042,20 @@ def word_mine(source, relationship_weights=None, allow_self_links=True, merge_sa
     # file_string = ""
     # for paragraph in read_doc.paragraphs:
     #     file_string += str(paragraph.text)
-    file_string = open(source).read()
-
-    # Parse the file_string, sending words, punctuations, and actions to node_sequence in the order they appear
-    temp_string = ""
-    i = 0
-    while i < len(file_string):
-        # If the character belongs in the punctuation list
-        if file_string[i] in punctuation_list:
-            # Send anything in temp_string to a new word
-            if temp_string != '':
-                node_sequence.append(nodes.Word(temp_string))
-                temp_string = ''
-            # If a space is encountered, skip it
-            # Otherwise, add the punctuation character to word_list
-            if not file_string[i] == ' ':
-                node_sequence.append(nodes.Punctuation(file_string[i]))
-
-        elif file_string[i] in action_list:
-            # Send anything in temp_string to a new word
-            if temp_string != '':
-                node_sequence.append(nodes.Word(temp_string))
-                temp_string = ''
-            node_sequence.append(nodes.Action(file_string[i]))
-
-        # If special < character is encountered, indicating word groups
-        elif file_string[i] == '<':
-            # Send temp_string to the word_list and clear temp_string
-            if temp_string != '':
-                node_sequence.append(nodes.Word(temp_string))
-                temp_string = ''
-            # Skip over < character
-            i += 1
-            # Loop until end of word group is reached (marked by >)
-            while file_string[i] != '>':
-                temp_string += file_string[i]
-                i += 1
-            # Send new temp_string to another word in the word_list
-            node_sequence.append(nodes.Word(temp_string))
-            # @ at the end of a word group will indicate that the word self-destructs after it appears once in usage
-            if node_sequence[-1].name[-1] == '@':
-                node_sequence[-1].name = node_sequence[-1].name[:-1]
-                node_sequence[-1].self_destruct = True
-            temp_string = ""
-            # Skip over > character
-            i += 1
-        # If we've reached the final character in the file, send whatever remains in temp_string to to a node
-        elif i == len(file_string) - 1:
-            if temp_string != '':
-                node_sequence.append(nodes.Word(temp_string))
-                temp_string = ''
-        else:
-            temp_string += file_string[i]
-        i += 1
+
+    # Parse the source, sending words, punctuations, and actions to node_sequence in the order they appear
+    for node_type, name, self_destruct in tokenize(text_chunks(source)):
+        node = node_type(name)
+        # @ at the end of a word group will indicate that the word self-destructs after it appears once in usage
+        if self_destruct:
+            node.self_destruct = True
+        node_sequence.append(node)
 
     if merge_same_words:
         # Send a copy of node_sequence to network, but remove all duplicate nodes first
         for node in node_sequence:
             if not network.has_node_with_name(node.name):
-                network.node_list.append(node)
+                network.add_nodes(node)
 
         # Now use the ordered (and still containing same-name nodes) node_sequence to build the links in network
         for i in range(len(node_sequence)):
@@ -312,6 +1080,61 @@ def word_mine(source, relationship_weights=None, allow_self_links=True, merge_sa
                     wrapping_index += len(network.node_list)
                 network.node_list[i].add_link(network.node_list[wrapping_index], distance_weights[x])
 
+    _finish_mined_network(network, allow_self_links)
+    return network
+
+
+def cached_word_mine(source, relationship_weights=None, allow_self_links=True, merge_same_words=False,
+                     cache_dir=None):
+    """
+    Mines a network with word_mine the first time a source is seen, and loads it back from a cache afterwards
+    Networks are saved in cache_dir under a hash of the source's contents together with the other arguments, so
+    editing the source or changing any argument mines it again.
+    :param source: str, path to a text file, see word_mine
+    :param relationship_weights: see word_mine
+    :param allow_self_links: see word_mine
+    :param merge_same_words: see word_mine
+    :param cache_dir: str, directory for the saved networks, defaults to chance in the user's cache directory
+    :return: instance of Network
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+                                 'chance')
+    key = hashlib.sha256()
+    with open(source, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            key.update(block)
+    settings = (FORMAT_VERSION, sorted(_distance_weights(relationship_weights).items()), bool(allow_self_links),
+                bool(merge_same_words))
+    key.update(repr(settings).encode('utf-8'))
+    path = os.path.join(cache_dir, key.hexdigest() + '.npz')
+    if os.path.exists(path):
+        return Network.load(path)
+    network = word_mine(source, relationship_weights, allow_self_links, merge_same_words)
+    os.makedirs(cache_dir, exist_ok=True)
+    network.save(path)
+    return network
+
+
+def _distance_weights(relationship_weights=None):
+    """
+    :param relationship_weights: dict of relative indices to word weights, see word_mine, or None for the default
+    :return: dict of relative indices to weights, without those weighted 0 or less
+    """
+    if relationship_weights is None:
+        relationship_weights = {1: 1000, 2: 100, 3: 80, 4: 60, 5: 50,
+                                6: 40, 7: 30, 8: 17, 9: 14, 10: 10,
+                                11: 10, 12: 10, 13: 5, 14: 5, 15: 75}
+    return {distance: weight for distance, weight in relationship_weights.items() if weight > 0}
+
+
+def _finish_mined_network(network, allow_self_links):
+    """
+    Last touches to a network mined from text, once all of its links are in
+    :param network: instance of Network
+    :param allow_self_links: Bool, see word_mine
+    """
+    punctuation_list = [' ', ',', '.', ';', '!', '?', ':', "-"]
     # Special handling for \n node: remove all links to Punctuation objects
     for node in network.node_list:
         if node.name == '\n':
@@ -323,5 +1146,166 @@ def word_mine(source, relationship_weights=None, allow_self_links=True, merge_sa
             if node.name != '\n':
                 node.remove_links_to_self()
 
-    return network
 
+def _wrap_index(index, length):
+    """
+    Wraps an index past either end of a sequence of given length back into it, the way word_mine does
+    :return: int, 0 <= index < length
+    """
+    while index >= length:
+        index = - (index - length)
+    while index <= -1 * length:
+        index += length
+    return index % length
+
+
+class NetworkBuilder:
+    """
+    Mines a network from text which arrives a piece at a time, such as a growing log of rehearsal notes, so that new
+    text never means reading everything again.
+
+    Links are added as each token arrives, and snapshot() can make a Network of the text so far at any point. That
+    Network is the one word_mine would make of the same text, including the links it wraps around from the end of
+    the text back to its start, so those are only added to snapshots and never to the builder itself.
+
+    Besides the nodes and their links, only the first and last few tokens are kept, as many as the largest distance
+    in relationship_weights, so memory grows with the network rather than with the text. When merging same words
+    that means with the vocabulary.
+    """
+
+    def __init__(self, relationship_weights=None, allow_self_links=True, merge_same_words=False):
+        """
+        :param relationship_weights: see word_mine
+        :param allow_self_links: see word_mine
+        :param merge_same_words: see word_mine
+        """
+        self.distance_weights = _distance_weights(relationship_weights)
+        self.allow_self_links = allow_self_links
+        self.merge_same_words = merge_same_words
+        self.token_count = 0
+        self.finished = False
+        # (node class, name, self_destruct) of each node, in the order they were made
+        self._node_specs = []
+        # Name to node index, only filled when merging same words
+        self._indices_by_name = {}
+        # For each node, dict of target node index to link weight, in the order the links were made
+        self._links = []
+        # For each node, how many times a link to it was added to after being made, which adds to its use_weight
+        self._repeat_uses = []
+        # Node indices of the first and the last tokens, enough of them to wrap links around the text
+        self._window = max([abs(distance) for distance in self.distance_weights] + [0])
+        self._first = []
+        self._last = collections.deque(maxlen=self._window)
+        # Text at the end of the last chunk given to feed() which may continue in the next one
+        self._held_text = ''
+
+    def __len__(self):
+        return len(self._node_specs)
+
+    def feed(self, text):
+        """
+        Adds the next part of the text, which may end in the middle of a word
+        :param text: str
+        """
+        tokens, self._held_text = _split_chunk(self._held_text + text)
+        self.feed_tokens(_token_tuples(tokens))
+
+    def feed_tokens(self, tokens):
+        """
+        Adds already tokenized text, as if it followed everything fed so far
+        :param tokens: iterable of (node class, name, self_destruct) tuples, as from tokenize()
+        """
+        if self.finished:
+            raise ValueError('Cannot feed a NetworkBuilder after finalize()')
+        for node_type, name, self_destruct in tokens:
+            self._add_token(node_type, name, self_destruct)
+
+    def _add_token(self, node_type, name, self_destruct):
+        index = self._indices_by_name.get(name) if self.merge_same_words else None
+        if index is None:
+            index = len(self._node_specs)
+            self._node_specs.append((node_type, name, self_destruct))
+            self._links.append({})
+            self._repeat_uses.append(0)
+            if self.merge_same_words:
+                self._indices_by_name[name] = index
+        # Link every token within reach of this one, in either direction, leaving what would wrap to snapshot()
+        last = self._last
+        for distance, weight in self.distance_weights.items():
+            if distance > 0:
+                if distance <= len(last):
+                    self._add_link(last[-distance], index, weight)
+            elif distance == 0:
+                self._add_link(index, index, weight)
+            elif -distance <= len(last):
+                self._add_link(index, last[distance], weight)
+        if len(self._first) < self._window:
+            self._first.append(index)
+        last.append(index)
+        self.token_count += 1
+
+    def _add_link(self, source, target, weight):
+        links = self._links[source]
+        if target in links:
+            links[target] += weight
+            self._repeat_uses[target] += 1
+        else:
+            links[target] = weight
+
+    def _wrapped_links(self):
+        """
+        :return: generator of (source node index, target node index, weight) for every link word_mine would wrap
+                 around the text fed so far
+        """
+        count = self.token_count
+        first = self._first
+        last = self._last
+        # Only tokens this close to either end have links reaching past it
+        positions = sorted(set(range(min(self._window, count))) | set(range(max(0, count - self._window), count)))
+        for position in positions:
+            for distance, weight in self.distance_weights.items():
+                if not 0 <= position + distance < count:
+                    target = _wrap_index(position + distance, count)
+                    yield self._index_at(position, first, last), self._index_at(target, first, last), weight
+
+    def _index_at(self, position, first, last):
+        if position < len(first):
+            return first[position]
+        return last[position - (self.token_count - len(last))]
+
+    def snapshot(self):
+        """
+        Makes a Network of the text fed so far, as word_mine would make of it
+        Text held back at the end of the last chunk given to feed() is left out until more text or finalize() shows
+        where its word ends. The Network shares nothing with the builder, which can go on being fed.
+        :return: instance of Network
+        """
+        node_list = []
+        for node_type, name, self_destruct in self._node_specs:
+            node = node_type(name)
+            if self_destruct:
+                node.self_destruct = True
+            node_list.append(node)
+        # The builder's links are already merged by target, so they can skip add_link()
+        for node, links, repeat_uses in zip(node_list, self._links, self._repeat_uses):
+            node.link_list = [nodes.Link(node_list[target], weight, node) for target, weight in links.items()]
+            node.use_weight += repeat_uses
+        for source, target, weight in self._wrapped_links():
+            node_list[source].add_link(node_list[target], weight)
+        network = Network()
+        network.add_nodes(node_list)
+        _finish_mined_network(network, self.allow_self_links)
+        return network
+
+    def finalize(self):
+        """
+        Ends the text, feeding whatever feed() held back, and makes the finished Network
+        Nothing more can be fed afterwards.
+        :return: instance of Network
+        """
+        if not self.finished:
+            if self._held_text:
+                self.feed_tokens(_token_tuples(_token_pattern.findall(self._held_text)))
+                self._held_text = ''
+            self.finished = True
+        return self.snapshot()
@@ -1,19 +1,44 @@
 #!/usr/bin/env python
 
-import random
-
 from . import rand
 
 
+class ChangeCounter:
+    """
+    Counts changes to the links and use weights of the nodes of one network, so its CompiledNetwork can tell whether
+    they have changed since compiling. Each node keeps the counters of the networks compiled with it, and its links
+    share them. Changes made by appending to or replacing a link_list directly are not counted.
+    """
+    def __init__(self):
+        self.count = 0
+
+
 class Link:
-    def __init__(self, target, weight):
+    def __init__(self, target, weight, source=None):
         """
         :param target: Node instance
         :param weight: Int
+        :param source: Node instance the link belongs to, whose change counters are told when the weight changes, or
+                       None if nothing needs telling
         """
         self.target = target
-        self.weight = weight
+        # A new link changes nothing until it is added to a node
+        self._weight = weight
         self.target_name = target.name
+        if source is None:
+            self._change_counters = ()
+        else:
+            self._change_counters = source._change_counters
+
+    @property
+    def weight(self):
+        return self._weight
+
+    @weight.setter
+    def weight(self, value):
+        self._weight = value
+        for counter in self._change_counters:
+            counter.count += 1
 
     def add_weight(self, amount=1):
         self.weight += amount
@@ -23,59 +48,115 @@ class Link:
 
 
 class Node:
-    def __init__(self, name=None, parent=None, self_destruct=False):
+    def __init__(self, name=None, parent=None, self_destruct=False, rng=None):
         """
         :param name: str or int, becomes the name and name of the node
         :param parent: instance of Network to which this node belongs (potentially usable to let nodes
                         trigger network-level events or modifications
+        :param rng: instance of chance.rand.RandomStream used by the node's own random choices,
+                    or None for the global random module
         """
         self.name = name
         self.self_destruct = self_destruct
-        self.use_weight = 1
+        self.rng = rng
+        self._use_weight = 1
         self.link_list = []
+        # ChangeCounters of the networks compiled with this node, see ChangeCounter
+        self._change_counters = []
+        # Links in link_list keyed by target node and by target name, see _link_index()
+        self._links_by_target = {}
+        self._links_by_name = {}
+        self._indexed_links = self.link_list
+        self._indexed_count = 0
         if parent is not None:
             if not type(parent).__name__ == 'Network':
                 raise TypeError
         # TODO: implement negative link weights - ie, make is possible to say two punctuations shouldnt come in a row..
 
-    def find_link(self, target_value):
+    def __getattr__(self, name):
+        # Nodes read by Network.load() build their link_list from the mapped file only when it is first used
+        if name == 'link_list' and '_load_links' in self.__dict__:
+            self.link_list = self.__dict__.pop('_load_links')()
+            return self.link_list
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+    @property
+    def use_weight(self):
+        return self._use_weight
+
+    @use_weight.setter
+    def use_weight(self, value):
+        self._use_weight = value
+        self._changed()
+
+    def _changed(self):
+        for counter in self._change_counters:
+            counter.count += 1
+
+    def _link_index(self):
+        """
+        :return: dict of every target node in self.link_list to its link
+        """
+        # Catch link_list being replaced, or links added or removed directly
+        if self._indexed_links is not self.link_list or self._indexed_count != len(self.link_list):
+            self.reindex_links()
+        return self._links_by_target
+
+    def reindex_links(self):
+        """
+        Rebuilds the link index used by find_link and add_link
+        Needed only after changing links in link_list, or the names of their targets, without going through Node methods
+        """
+        self._links_by_target = {}
+        self._links_by_name = {}
         for link in self.link_list:
-            if link.target.value == target_value:
-                return link
-        # If we've made it this far without returning, it means no matching link was found. Return False.
-        return False
+            self._links_by_target.setdefault(link.target, link)
+            self._links_by_name.setdefault(link.target.name, link)
+        self._indexed_links = self.link_list
+        self._indexed_count = len(self.link_list)
+
+    def find_link(self, target_value):
+        """
+        :param target_value: Node instance, or the name of a node
+        :return: the Link pointing to target_value (or the first pointing to a node with that name), or False if
+                 there is none
+        """
+        links_by_target = self._link_index()
+        if isinstance(target_value, Node):
+            link = links_by_target.get(target_value)
+        else:
+            link = self._links_by_name.get(target_value)
+        # If no matching link was found, return False.
+        if link is None:
+            return False
+        return link
+
+    def _add_one_link(self, target, weight):
+        link = self._link_index().get(target)
+        if link is not None:
+            link.add_weight(weight)
+            link.target.use_weight += 1
+        else:
+            link = Link(target, weight, self)
+            self.link_list.append(link)
+            self._changed()
+            self._links_by_target[target] = link
+            self._links_by_name.setdefault(target.name, link)
+            self._indexed_count = len(self.link_list)
 
     def add_link(self, target, weight=1):
         """
         :param target: Node or list of Nodes
         :param weight: weight (applied to all if target is a list
         """
-        # Check to make sure there isn't already a link to the target node
+        if weight < 0:
+            weight = 0
+        # Links to a target which is already linked add to the existing link's weight
         if isinstance(target, list):
             for target_item in target:
-                already_exists = False
-                if weight < 0:
-                    weight = 0
-                for link in self.link_list:
-                    if link.target == target_item:
-                        already_exists = True
-                        link.add_weight(weight)
-                        link.target.use_weight += 1
-                        break
-                if not already_exists:
-                    self.link_list.append(Link(target_item, weight))
+                self._add_one_link(target_item, weight)
         else:
-            already_exists = False
-            if weight < 0:
-                weight = 0
-            for link in self.link_list:
-                if link.target == target:
-                    already_exists = True
-                    link.add_weight(weight)
-                    link.target.use_weight += 1
-                    break
-            if not already_exists:
-                self.link_list.append(Link(target, weight))
+            self._add_one_link(target, weight)
 
     def add_link_to_self(self, source, weight):
         """
@@ -117,8 +198,16 @@ class Node:
             for node in target:
                 self.add_reciprocal_link(node, weight)
 
+    def link_distribution(self):
+        """
+        Prepares the links of this node for drawing the next node
+        :return: instance of chance.rand.DiscreteDistribution with the link targets as outcomes
+        """
+        return rand.DiscreteDistribution([(link.target, link.weight) for link in self.link_list])
+
     def remove_links_to_self(self):
         self.link_list[:] = [link for link in self.link_list if link.target != self]
+        self._changed()
 
     def get_value(self):
         return self.name
@@ -127,14 +216,15 @@ class Node:
 class NoteBehavior(Node):
     # For use as Node objects in a Network, allows continuous relationship-based behavior for notes
     def __init__(self, name=None, direction=None, special_action=None,
-                 interval_weights=None, pitch_set=None, count_intervals_by_slots=False):
+                 interval_weights=None, pitch_set=None, count_intervals_by_slots=False, rng=None):
         """
         :param direction: Integer, -1 for down, 1 for up, 0 for either
         :param interval_weights: array of Weight objects or tuples standing in place of them
         :param pitch_set: list of available pitches (diatonic, octatonic, etc.)
+        :param rng: instance of chance.rand.RandomStream, or None for the global random module
         :return:
         """
-        Node.__init__(self, name=name)
+        Node.__init__(self, name=name, rng=rng)
         self.direction = direction
         self.special_action = special_action
         self.interval_weights = interval_weights
@@ -148,7 +238,7 @@ class NoteBehavior(Node):
 
         if not self.count_intervals_by_slots:
             # Roll interval based on self.weights
-            interval = rand.weighted_rand(self.interval_weights, 'interpolated', True)
+            interval = rand.weighted_rand(self.interval_weights, 'interpolated', True, rng=self.rng)
             # Make sure to invert direction if needed
             if self.direction == -1:
                 interval *= -1
@@ -178,13 +268,13 @@ class NoteBehavior(Node):
             if start_index == -1:
                 print("WARNING: matching pitch wasn't found in NoteBehavior.move_pitch()")
             # Find the slot_interval to move along the pitch_set by
-            slot_interval = rand.weighted_rand(self.interval_weights, 'interpolated', True)
+            slot_interval = rand.weighted_rand(self.interval_weights, 'interpolated', True, rng=self.rng)
             # Make sure to invert direction if needed
             if self.direction == -1:
                 slot_interval *= -1
             elif self.direction == 0:
                 # If direction == 0 (either), roll heads or tails to determine if slot_interval should invert
-                if random.randint(0, 1) == 0:
+                if rand.as_stream(self.rng).randint(0, 1) == 0:
                     slot_interval *= -1
             # Finally, add adjusted slot_interval to start_index, and use it to find the return_pitch, and return it
             return_index = start_index + slot_interval
@@ -243,12 +333,12 @@ class Value(Node):
 
 
 class WeightListNode(Node):
-    def __init__(self, name, weights=None):
-        Node.__init__(self, name=name)
+    def __init__(self, name, weights=None, rng=None):
+        Node.__init__(self, name=name, rng=rng)
         self.weights = weights
 
     def get_value(self, do_round=True):
-        return rand.weighted_rand(self.weights, 'interpolated', do_round=do_round)
+        return rand.weighted_rand(self.weights, 'interpolated', do_round=do_round, rng=self.rng)
 
 
 class Action(Node):
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""
+Generating many walks of one network at once in a pool of worker processes.
+
+The network is compiled once and its arrays are copied into shared memory. Each worker attaches to them when it
+starts, so tasks only carry a step count and a seed, and results come back as arrays of node indices.
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy
+
+from .network import CompiledNetwork
+from .rand import as_stream, RandomStream
+
+# Set in each worker process by _attach_worker()
+_worker_network = None
+_worker_blocks = []
+
+
+class SharedArrays:
+    """
+    Copies of a set of numpy arrays in shared memory blocks, which other processes can attach to by name.
+    The blocks are freed by close(), or when used as a context manager, on leaving the with block.
+    """
+
+    def __init__(self, arrays):
+        """
+        :param arrays: dict of names to numpy arrays
+        """
+        self._blocks = []
+        # Name to (block name, shape, dtype string) for attach()
+        self.specs = {}
+        try:
+            for name, array in arrays.items():
+                # Blocks can't be empty, even for an array with no elements
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self._blocks.append(block)
+                shared = numpy.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                shared[...] = array
+                self.specs[name] = (block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    @staticmethod
+    def attach(specs):
+        """
+        Attaches to arrays shared by another process
+        :param specs: SharedArrays.specs of the process sharing the arrays
+        :return: tuple of (dict of names to read only numpy arrays, list of SharedMemory blocks that must be kept
+                 open as long as the arrays are used)
+        """
+        arrays = {}
+        blocks = []
+        for name, (block_name, shape, dtype) in specs.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            array = numpy.ndarray(shape, dtype=dtype, buffer=block.buf)
+            array.setflags(write=False)
+            arrays[name] = array
+        return arrays, blocks
+
+
+def _attach_worker(specs):
+    global _worker_network, _worker_blocks
+    arrays, _worker_blocks = SharedArrays.attach(specs)
+    _worker_network = CompiledNetwork.from_arrays(arrays)
+
+
+def _walk_task(task):
+    steps, seed_sequence = task
+    walked = _worker_network.walk(steps, rng=RandomStream(seed_sequence))
+    return numpy.array(walked, dtype=numpy.intp)
+
+
+def parallel_walks(network, walks, steps, processes=None, rng=None, as_values=False):
+    """
+    Generates many independent walks through a network in parallel, for example one per part or per take
+    Every walk starts with a node picked by use weight, as Network.walk does from a fresh network. Each walk gets
+    its own RandomStream spawned from rng, so the results don't depend on how walks are shared among workers.
+    :param network: instance of chance.network.Network, compiled first if it hasn't been or has changed since
+    :param walks: int, how many walks to generate
+    :param steps: int, how many nodes to pick in each walk
+    :param processes: int, number of worker processes, defaults to the number of CPUs
+    :param rng: RandomStream to spawn each walk's stream from. Defaults to network.rng, or fresh entropy if that is
+                None too
+    :param as_values: Bool, return each node's get_value() if True, or the node itself if False
+    :return: list of walks lists of steps nodes (or values)
+    """
+    compiled = network._current_compiled()
+    if compiled is None:
+        compiled = network.compile()
+    if rng is None:
+        rng = network.rng
+    streams = as_stream(rng).spawn(walks)
+    tasks = [(steps, stream.seed_sequence) for stream in streams]
+    with SharedArrays(compiled.arrays()) as shared:
+        with multiprocessing.Pool(processes, initializer=_attach_worker, initargs=(shared.specs,)) as pool:
+            chunk_size = max(1, walks // (4 * (processes or multiprocessing.cpu_count())))
+            results = pool.map(_walk_task, tasks, chunksize=chunk_size)
+    if as_values:
+        return [compiled.values_at(walked.tolist()) for walked in results]
+    return [compiled.nodes_at(walked.tolist()) for walked in results]
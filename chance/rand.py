@@ -2,10 +2,17 @@
 
 from __future__ import division
 
+import bisect
+import collections
 import copy
+import itertools
+import math
 import random
+import threading
 
-# from . import nodes
+import numpy
+
+from . import nodes
 
 
 class Weight:
@@ -14,28 +21,127 @@ class Weight:
         self.y = weight
 
 
-def weighted_rand(input_weights, run_type='interpolated', do_round=False):
+class RandomStream:
     """
-    Generates a non-uniform random value based on a list of input_weights or tuplets.
-    Can work in two ways based on run_type:
+    An independent, seedable stream of random numbers backed by a numpy Generator.
 
-        'interpolated' - Treats input_weights as coordinates for a probability distribution curve and rolls accordingly.
-                         Constructs a piece-wise linear curve according to coordinates given in input_weights
-                         and rolls random values in the curve's bounding box until a value is found under the curve
-                         All input_weights outcome values must be numbers.
+    Streams give the same methods as the random module (random, uniform, randint), and each also takes a size to
+    draw a whole numpy array at once. Scalar draws are handed out from a block of numbers drawn from the generator
+    in one go, which is much faster than asking the generator for one number at a time.
 
-        'discreet'     - treats each outcome (Weight.x) as a discreet unit with a chance to occur.
-                         Constructs a line segment where each weight is outcome is alloted a length
-                         and rolls a random point.
-                         input_weights outcomes may be of any type, including instances
+    A stream must only be used from one thread. Use spawn() to give each thread or worker process its own stream;
+    children are statistically independent of their parent and of each other, and are reproducible from the
+    parent's seed.
+    """
+    # Numbers drawn at once to serve scalar draws
+    BLOCK_SIZE = 1024
 
-    :param input_weights: Array of Weight objects or tuples of form (outcome, weight)
-    :param run_type: str of value 'interpolated' or 'discreet'.
-    :param do_round: Bool, determines if the return value should be rounded to an integer or not (only applicable in
-                      run_type='interpolated')
-    :return: Returns a random name based on the weights
+    def __init__(self, seed=None):
+        """
+        :param seed: int, numpy.random.SeedSequence, or None to seed from fresh entropy
+        """
+        if isinstance(seed, numpy.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = numpy.random.SeedSequence(seed)
+        self.generator = numpy.random.Generator(numpy.random.PCG64(self.seed_sequence))
+        self._block = []
+        self._index = 0
+
+    def spawn(self, n):
+        """
+        :param n: int
+        :return: list of n new, independent RandomStream
+        """
+        return [RandomStream(child) for child in self.seed_sequence.spawn(n)]
+
+    def random(self, size=None):
+        """
+        :param size: int or None
+        :return: float in [0, 1), or numpy array of size floats
+        """
+        if size is not None:
+            return self.generator.random(size)
+        if self._index >= len(self._block):
+            self._block = self.generator.random(self.BLOCK_SIZE).tolist()
+            self._index = 0
+        value = self._block[self._index]
+        self._index += 1
+        return value
+
+    def uniform(self, a, b, size=None):
+        """
+        :param a: float
+        :param b: float
+        :param size: int or None
+        :return: float between a and b, or numpy array of size floats
+        """
+        if size is not None:
+            return self.generator.uniform(a, b, size)
+        return a + (b - a) * self.random()
+
+    def randint(self, a, b, size=None):
+        """
+        :param a: int
+        :param b: int, included in the range like random.randint
+        :param size: int or None
+        :return: int between a and b, or numpy array of size ints
+        """
+        if size is not None:
+            return self.generator.integers(a, b, size, endpoint=True)
+        return min(b, a + int(self.random() * (b - a + 1)))
+
+
+class GlobalRandom:
+    """
+    The random module for scalar draws and numpy's global generator for arrays, behind the RandomStream interface.
+
+    This is what every sampler uses when it isn't given a stream, so seeding the random module (and numpy.random
+    for array draws) works as it always has.
+    """
+
+    def spawn(self, n):
+        """
+        :param n: int
+        :return: list of n new RandomStream seeded from fresh entropy
+        """
+        return RandomStream().spawn(n)
+
+    def random(self, size=None):
+        if size is not None:
+            return numpy.random.random(size)
+        return random.random()
+
+    def uniform(self, a, b, size=None):
+        if size is not None:
+            return numpy.random.uniform(a, b, size)
+        return random.uniform(a, b)
+
+    def randint(self, a, b, size=None):
+        if size is not None:
+            return numpy.random.randint(a, b + 1, size, dtype=numpy.int64)
+        return random.randint(a, b)
+
+
+global_random = GlobalRandom()
+
+
+def as_stream(rng=None):
+    """
+    :param rng: RandomStream, or None for the global random module
+    :return: rng, or global_random if rng is None
+    """
+    if rng is None:
+        return global_random
+    return rng
+
+
+def as_weight_list(input_weights):
+    """
+    Converts a list of Weight objects, Node objects or tuples of form (outcome, weight) to a new list of Weight objects
+    :param input_weights: list of Weight, Node or tuple
+    :return: list of Weight
     """
-    from .nodes import Node
     if input_weights is None:
         # input_weights must be a real value
         raise TypeError
@@ -45,90 +151,385 @@ def weighted_rand(input_weights, run_type='interpolated', do_round=False):
     for i in range(len(weights)):
         if isinstance(weights[i], Weight):
             pass
-        elif isinstance(weights[i], Node):
+        elif isinstance(weights[i], nodes.Node):
             weights[i] = Weight(weights[i].name, weights[i].use_weight)
         elif isinstance(weights[i], tuple):
             weights[i] = Weight(weights[i][0], weights[i][1])
         else:
             raise TypeError("Weight at index %s is not a valid type." % str(i))
+    return weights
 
-    # Special handling in case an array of just one weight is being passed - simply return the weight's name
-    if len(weights) == 1:
-        return weights[0].x
 
-    if run_type == 'interpolated':
-        # Sort list so that weights are listed in order of ascending X name
-        weights = sorted(weights, key=lambda this_weight: this_weight.x)
-        return_number = 0
-        x_min = 0
-        y_min = 0
-        x_max = 0
-        y_max = 0
-
-        for point in weights:
-            if x_min > point.x:
-                x_min = point.x
-            if x_max < point.x:
-                x_max = point.x
-            if y_max < point.y:
-                y_max = point.y
-        # Roll random numbers until a valid one is found
-        point_found = False
-        t_count = 0
-        while not point_found:
-            # Get sample point
-            sample = Weight(random.uniform(x_min, x_max), random.uniform(y_min, y_max))
-            i = 0
-            while i < (len(weights) - 1):
-                if weights[i].x <= sample.x <= weights[i + 1].x:
-                    f_slope = (weights[i + 1].y - weights[i].y) / (weights[i + 1].x - weights[i].x)
-                    f_yint = weights[i].y - (f_slope * weights[i].x)
-                    f_x = (f_slope * sample.x) + f_yint
-                    if sample.y <= f_x:
-                        return_number = sample.x
-                        point_found = True
-                i += 1
-            t_count += 1
-            if t_count == 1000:
-                print("WARNING: Point in weighted_rand() not being found after over 1000 attempts")
+class WeightedDistribution:
+    """
+    A piecewise linear probability distribution curve, prepared once and then drawn from any number of times.
+
+    The weights are treated as coordinates of the curve, as in weighted_rand(run_type='interpolated'). The area under
+    each segment of the curve is summed into a cumulative table once, so each draw finds its segment with a binary
+    search and solves for its point inside the segment directly, instead of rolling points until one lands under
+    the curve. Parts of the curve below zero carry no probability.
+    """
+
+    def __init__(self, input_weights):
+        """
+        :param input_weights: Array of Weight objects or tuples of form (outcome, weight). All outcomes must be numbers.
+        """
+        weights = sorted(as_weight_list(input_weights), key=lambda this_weight: this_weight.x)
+        self._build([weight.x for weight in weights], [weight.y for weight in weights])
+
+    @classmethod
+    def from_arrays(cls, outcomes, weights):
+        """
+        Builds a distribution straight from outcomes and weights, without making Weight objects
+        :param outcomes: sequence of numbers in ascending order
+        :param weights: sequence of numbers, one for each outcome
+        :return: WeightedDistribution
+        """
+        distribution = cls.__new__(cls)
+        xs = numpy.asarray(outcomes, dtype=float)
+        ys = numpy.asarray(weights, dtype=float)
+        if len(xs) < 2 or (ys < 0).any():
+            # Curves dipping below zero need clipping segment by segment
+            distribution._build(numpy.asarray(outcomes).tolist(), numpy.asarray(weights).tolist())
+            return distribution
+        widths = numpy.diff(xs)
+        areas = (ys[:-1] + ys[1:]) * widths / 2
+        keep = areas > 0
+        if not keep.any():
+            raise ValueError("Weights enclose no area under the curve")
+        starts = xs[:-1][keep]
+        heights = ys[:-1][keep]
+        slopes = numpy.diff(ys)[keep] / widths[keep]
+        cumulative = numpy.cumsum(areas[keep])
+        distribution.min_outcome = numpy.asarray(outcomes)[0].item()
+        distribution.max_outcome = numpy.asarray(outcomes)[-1].item()
+        distribution.starts = starts.tolist()
+        distribution.heights = heights.tolist()
+        distribution.slopes = slopes.tolist()
+        distribution.cumulative = cumulative.tolist()
+        distribution.total = distribution.cumulative[-1]
+        distribution._arrays = (starts, heights, slopes, cumulative)
+        return distribution
+
+    def _build(self, xs, ys):
+        """
+        :param xs: list of outcomes in ascending order
+        :param ys: list of weights, one for each outcome
+        """
+        if not xs:
+            raise ValueError("Cannot build a distribution from an empty list of weights")
+        self.min_outcome = xs[0]
+        self.max_outcome = xs[-1]
+        # Start x, start y, slope and cumulative area at the end of every segment with any area
+        self.starts = []
+        self.heights = []
+        self.slopes = []
+        self.cumulative = []
+        total = 0
+        for i in range(len(xs) - 1):
+            for x0, y0, x1, y1 in self._positive_parts(xs[i], ys[i], xs[i + 1], ys[i + 1]):
+                area = (y0 + y1) * (x1 - x0) / 2
+                if area <= 0:
+                    continue
+                total += area
+                self.starts.append(x0)
+                self.heights.append(y0)
+                self.slopes.append((y1 - y0) / (x1 - x0))
+                self.cumulative.append(total)
+        self.total = total
+        if len(xs) > 1 and not total:
+            raise ValueError("Weights enclose no area under the curve")
+        self._arrays = None
+
+    @staticmethod
+    def _positive_parts(x0, y0, x1, y1):
+        """
+        Clips the segment from (x0, y0) to (x1, y1) to the part at or above y = 0
+        :return: list of (x0, y0, x1, y1)
+        """
+        if x1 <= x0 or (y0 <= 0 and y1 <= 0):
+            return []
+        if y0 >= 0 and y1 >= 0:
+            return [(x0, y0, x1, y1)]
+        crossing = x0 + (x1 - x0) * y0 / (y0 - y1)
+        if y0 < 0:
+            return [(crossing, 0, x1, y1)]
+        return [(x0, y0, crossing, 0)]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _solve(self, segment, area):
+        """
+        Finds the x at which the area under segment, from its start, reaches area
+        """
+        height = self.heights[segment]
+        # Root of height * t + slope * t ** 2 / 2 = area, in a form that holds for a slope of 0
+        root = height + math.sqrt(max(0, height * height + 2 * self.slopes[segment] * area))
+        if root <= 0:
+            return self.starts[segment]
+        return self.starts[segment] + 2 * area / root
+
+    def draw(self, do_round=False, rng=None):
+        """
+        Draws one random outcome
+        :param do_round: Bool, determines if the return value should be rounded to an integer or not
+        :param rng: RandomStream, or None for the global random module
+        :return: float, or int if do_round
+        """
+        if not self.starts:
+            return_number = self.min_outcome
+        else:
+            target = as_stream(rng).uniform(0, self.total)
+            segment = min(bisect.bisect_left(self.cumulative, target), len(self.starts) - 1)
+            area = target - (self.cumulative[segment - 1] if segment else 0)
+            return_number = self._solve(segment, area)
         if do_round:
             return_number = int(round(return_number))
         return return_number
 
+    def sample(self, n, do_round=False, rng=None):
+        """
+        Draws n random outcomes at once
+        :param n: int
+        :param do_round: Bool, determines if the return values should be rounded to integers or not
+        :param rng: RandomStream, or None for numpy's global generator
+        :return: numpy array of n floats, or ints if do_round
+        """
+        if not self.starts:
+            samples = numpy.full(n, self.min_outcome, dtype=float)
+        else:
+            if self._arrays is None:
+                self._arrays = (numpy.array(self.starts, dtype=float),
+                                numpy.array(self.heights, dtype=float),
+                                numpy.array(self.slopes, dtype=float),
+                                numpy.array(self.cumulative, dtype=float))
+            starts, heights, slopes, cumulative = self._arrays
+            targets = as_stream(rng).uniform(0, self.total, n)
+            segments = numpy.minimum(numpy.searchsorted(cumulative, targets), len(starts) - 1)
+            areas = targets - numpy.where(segments > 0, cumulative[segments - 1], 0)
+            segment_heights = heights[segments]
+            roots = segment_heights + numpy.sqrt(numpy.maximum(
+                0, segment_heights * segment_heights + 2 * slopes[segments] * areas))
+            offsets = numpy.divide(2 * areas, roots, out=numpy.zeros(n), where=roots > 0)
+            samples = starts[segments] + offsets
+        if do_round:
+            return numpy.round(samples).astype(int)
+        return samples
+
+
+class DiscreteDistribution:
+    """
+    A set of discreet outcomes with weighted chances, prepared once and then drawn from any number of times.
+
+    Outcomes are treated as in weighted_rand(run_type='discreet'). The weights are summed into a cumulative table
+    once, so each draw finds its outcome with a binary search instead of walking the whole list.
+    """
+
+    def __init__(self, input_weights):
+        """
+        :param input_weights: Array of Weight objects, Node objects or tuples of form (outcome, weight).
+                              Outcomes may be of any type, including instances.
+        """
+        weights = as_weight_list(input_weights)
+        if not weights:
+            raise ValueError("Cannot build a distribution from an empty list of weights")
+        self.outcomes = [weight.x for weight in weights]
+        self.cumulative = list(itertools.accumulate(weight.y for weight in weights))
+        self.total = self.cumulative[-1]
+        self._cumulative_array = None
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def draw_index(self, rng=None):
+        """
+        :param rng: RandomStream, or None for the global random module
+        :return: int, index in self.outcomes of one random outcome
+        """
+        if self.total <= 0:
+            return 0
+        return min(bisect.bisect_right(self.cumulative, as_stream(rng).random() * self.total), len(self.outcomes) - 1)
+
+    def draw(self, rng=None):
+        """
+        :param rng: RandomStream, or None for the global random module
+        :return: one random outcome
+        """
+        return self.outcomes[self.draw_index(rng)]
+
+    def sample_indices(self, n, rng=None):
+        """
+        Draws the indices of n random outcomes at once
+        :param n: int
+        :param rng: RandomStream, or None for numpy's global generator
+        :return: numpy array of n ints, indices in self.outcomes
+        """
+        if self.total <= 0:
+            return numpy.zeros(n, dtype=int)
+        if self._cumulative_array is None:
+            self._cumulative_array = numpy.array(self.cumulative, dtype=float)
+        indices = numpy.searchsorted(self._cumulative_array, as_stream(rng).random(n) * self.total, side='right')
+        return numpy.minimum(indices, len(self.outcomes) - 1)
+
+    def sample(self, n, rng=None):
+        """
+        Draws n random outcomes at once
+        :param n: int
+        :param rng: RandomStream, or None for numpy's global generator
+        :return: list of n outcomes
+        """
+        return [self.outcomes[i] for i in self.sample_indices(n, rng).tolist()]
+
+
+class DistributionCache:
+    """
+    A least recently used cache of prepared distributions, keyed on the contents of the weights they were built from.
+
+    Looking up a list of weights costs one pass over it to build the key, instead of converting, sorting and summing
+    it again. The key holds every outcome and weight along with the outcome's type, so changing any weight (or
+    passing an equal list built elsewhere) finds the right distribution. Weights with unhashable outcomes are
+    prepared every time without being cached.
+    """
+
+    def __init__(self, max_size=256):
+        """
+        :param max_size: int, most distributions kept at once. 0 disables caching.
+        """
+        self.max_size = max_size
+        self._distributions = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._distributions)
+
+    @staticmethod
+    def _key(input_weights, run_type):
+        """
+        :return: tuple of run_type followed by (outcome type, outcome, weight) for every weight
+        """
+        key = [run_type]
+        for i, weight in enumerate(input_weights):
+            if isinstance(weight, Weight):
+                key.append((type(weight.x), weight.x, weight.y))
+            elif isinstance(weight, nodes.Node):
+                key.append((type(weight.name), weight.name, weight.use_weight))
+            elif isinstance(weight, tuple):
+                key.append((type(weight[0]), weight[0], weight[1]))
+            else:
+                raise TypeError("Weight at index %s is not a valid type." % str(i))
+        return tuple(key)
+
+    def get(self, input_weights, run_type='interpolated'):
+        """
+        Finds the prepared distribution for input_weights, building and caching it if there is none
+        :param input_weights: Array of Weight objects, Node objects or tuples of form (outcome, weight)
+        :param run_type: str of value 'interpolated' or 'discreet'
+        :return: WeightedDistribution if run_type is 'interpolated', DiscreteDistribution if 'discreet'
+        """
+        if input_weights is None:
+            # input_weights must be a real value
+            raise TypeError
+        if run_type == 'interpolated':
+            distribution_type = WeightedDistribution
+        elif run_type == 'discreet':
+            distribution_type = DiscreteDistribution
+        else:
+            raise ValueError("Invalid run type '%s'" % run_type)
+        key = self._key(input_weights, run_type)
+        try:
+            with self._lock:
+                distribution = self._distributions.get(key)
+                if distribution is not None:
+                    self._distributions.move_to_end(key)
+                    self.hits += 1
+                    return distribution
+        except TypeError:
+            # An outcome can't be hashed, so this can't be cached
+            return distribution_type(input_weights)
+        distribution = distribution_type(input_weights)
+        with self._lock:
+            self.misses += 1
+            if self.max_size > 0:
+                self._distributions[key] = distribution
+                while len(self._distributions) > self.max_size:
+                    self._distributions.popitem(last=False)
+                    self.evictions += 1
+        return distribution
+
+    def clear(self):
+        """
+        Empties the cache and resets its counters
+        """
+        with self._lock:
+            self._distributions.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# Shared by every call to weighted_rand
+distribution_cache = DistributionCache()
+
+
+def weighted_rand(input_weights, run_type='interpolated', do_round=False, rng=None):
+    """
+    Generates a non-uniform random value based on a list of input_weights or tuplets.
+    Can work in two ways based on run_type:
+
+        'interpolated' - Treats input_weights as coordinates for a probability distribution curve and rolls accordingly.
+                         Constructs a piece-wise linear curve according to coordinates given in input_weights
+                         and draws a value from it with a WeightedDistribution.
+                         All input_weights outcome values must be numbers.
+
+        'discreet'     - treats each outcome (Weight.x) as a discreet unit with a chance to occur.
+                         Constructs a line segment where each weight is outcome is alloted a length
+                         and rolls a random point with a DiscreteDistribution.
+                         input_weights outcomes may be of any type, including instances
+
+    Distributions are prepared once per distinct list of weights and kept in distribution_cache, so calling
+    repeatedly with the same weights only costs a lookup and a draw.
+
+    :param input_weights: Array of Weight objects or tuples of form (outcome, weight)
+    :param run_type: str of value 'interpolated' or 'discreet'.
+    :param do_round: Bool, determines if the return value should be rounded to an integer or not (only applicable in
+                      run_type='interpolated')
+    :param rng: RandomStream to draw from, or None for the global random module
+    :return: Returns a random name based on the weights
+    """
+    # Special handling in case an array of just one weight is being passed - simply return the weight's name
+    if input_weights is not None and len(input_weights) == 1:
+        return as_weight_list(input_weights)[0].x
+
+    if run_type == 'interpolated':
+        return distribution_cache.get(input_weights, run_type).draw(do_round, rng)
     elif run_type == 'discreet':
-        # Find total name of points y coords
-        prob_sum = 0
-        point_found = False
-        for current_point in weights:
-            prob_sum += current_point.y
-        rand_num = random.uniform(0, prob_sum)
-        current_pos = 0
-        index = 0
-        while index < len(weights):
-            if current_pos <= rand_num <= (current_pos + weights[index].y):
-                point_found = True
-                return weights[index].x
-            current_pos += weights[index].y
-            index += 1
-        if not point_found:
-            print("ERROR: Point at " + str(rand_num) + " was not found in discreet_weighted_rand!")
-            print("Cumulative range is " + str(prob_sum))
-            return False
+        return distribution_cache.get(input_weights, run_type).draw(rng)
     else:
         print("ERROR: run type of '" + run_type + "' is invalid. Ignoring...")
         return False
 
 
 def random_weight_list(min_outcome, max_outcome, max_weight_density=0.1,
-                       max_possible_weights=None, return_as_tuples=False):
+                       max_possible_weights=None, return_as_tuples=False,
+                       return_as_arrays=False, return_distribution=False, rng=None):
     """
     Generates a list of Weight within a given min_outcome and max_outcome bound.
     max_weight_density gives the maximum density of resulting weights, it is multiplied by (max_outcome - min_outcome)
+    Given a RandomStream, candidate outcomes are drawn in bulk and duplicates dropped, so wide ranges stay fast.
+    Without one, the random module is drawn from one outcome at a time as it always has been, so seeding it still
+    reproduces the same lists.
     :param min_outcome: int
     :param max_outcome: int
     :param max_weight_density: float
     :param max_possible_weights: int
     :param return_as_tuples: Bool
+    :param return_as_arrays: Bool, return a tuple of two numpy arrays (outcomes, weights) instead of a list
+    :param return_distribution: Bool, return a WeightedDistribution built from the weights instead of a list
+    :param rng: RandomStream, or None for the random module
     :return: list of Weight instances
     """
     # Prevent sneaky errors
@@ -149,38 +550,33 @@ def random_weight_list(min_outcome, max_outcome, max_weight_density=0.1,
     if (max_possible_weights is not None) and (max_weights > max_possible_weights):
         max_weights = max_possible_weights
 
-    # Create and populate weight_list
-    weight_list = []
-    # pin down random weights at min_outcome and max_outcome to keep the weight_list properly bounded
-    weight_list.append(Weight(min_outcome, random.randint(1, 100)))
-    weight_list.append(Weight(max_outcome, random.randint(1, 100)))
-    # Main population loop. Subtract 2 from max_weights to account for already inserted start and end caps
-    for i in range(0, max_weights - 2):
-        outcome = random.randint(min_outcome, max_outcome)
-        is_duplicate_outcome = False
-        # Test contents in weight_list to make sure none of them have the same outcome
-        for index in range(0, len(weight_list)):
-            if weight_list[index].x == outcome:
-                is_duplicate_outcome = True
-                break
-        if not is_duplicate_outcome:
-            weight_list.append(Weight(outcome, random.randint(1, 100)))
-
-    # Sort the list
-    weight_list = sorted(weight_list, key=lambda z: z.x)
+    # Pin down min_outcome and max_outcome to keep the weights properly bounded.
+    # Subtract 2 from max_weights to account for the start and end caps
+    if rng is None:
+        outcome_weights = {min_outcome: random.randint(1, 100)}
+        max_weight = random.randint(1, 100)
+        outcome_weights.setdefault(max_outcome, max_weight)
+        for i in range(0, max_weights - 2):
+            outcome = random.randint(min_outcome, max_outcome)
+            if outcome not in outcome_weights:
+                outcome_weights[outcome] = random.randint(1, 100)
+        outcomes = numpy.array(sorted(outcome_weights), dtype=numpy.int64)
+        weights = numpy.array([outcome_weights[outcome] for outcome in outcomes.tolist()], dtype=numpy.int64)
+    else:
+        candidates = rng.randint(min_outcome, max_outcome, max(0, max_weights - 2))
+        outcomes = numpy.sort(numpy.concatenate(([min_outcome, max_outcome], candidates)))
+        # Drop duplicate outcomes, which sit next to each other once sorted
+        outcomes = outcomes[numpy.concatenate(([True], outcomes[1:] != outcomes[:-1]))]
+        weights = rng.randint(1, 100, len(outcomes))
 
     # Undo resolution multiplication if necessary
     if resolution_multiplier is not None:
-        resolved_weight_list = []
-        for old_weight in weight_list:
-            resolved_weight_list.append(Weight(round((old_weight.x / resolution_multiplier), 3), old_weight.y))
-        weight_list = resolved_weight_list
+        outcomes = numpy.round(outcomes / resolution_multiplier, 3)
+    if return_as_arrays:
+        return outcomes, weights
+    if return_distribution:
+        return WeightedDistribution.from_arrays(outcomes, weights)
     if return_as_tuples:
-        return_tuple_list = []
-        for old_weight in weight_list:
-            return_tuple_list.append((old_weight.x, old_weight.y))
-        return return_tuple_list
+        return list(zip(outcomes.tolist(), weights.tolist()))
     else:
-        return weight_list
-
-
+        return [Weight(outcome, weight) for outcome, weight in zip(outcomes.tolist(), weights.tolist())]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+"""
+Passing state changes from the GUI thread to the audio thread.
+"""
+
+import queue
+import time
+
+from ring import SpscRing
+
+
+class CommandQueue(SpscRing):
+    """
+    A single-producer, single-consumer ring of pending commands.
+
+    The GUI thread puts commands, and the audio callback drains them at the
+    start of each chunk, so every change lands between chunks rather than
+    part way through one. Draining an empty queue allocates nothing.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Args:
+            capacity (int): Most commands that can be pending at once
+        """
+        SpscRing.__init__(self, capacity)
+        self._slots = [None] * self._size
+        self.applied = 0.0
+        self.last_latency = 0.0
+        self.worst_latency = 0.0
+        self.last_applied_at = None
+
+    def put(self, function, *args):
+        """
+        Queue function(*args) to be called by the consumer. Producer only.
+
+        Args:
+            function (callable):
+            *args: Arguments for function
+
+        Raises:
+            queue.Full: if capacity commands are already pending
+        """
+        if self._full():
+            raise queue.Full
+        self._slots[self._tail] = (function, args, time.perf_counter())
+        self._push()
+
+    def drain(self, sample_time=None):
+        """
+        Call every pending command in the order it was put. Consumer only.
+
+        Args:
+            sample_time (float): Sample time the commands take effect at,
+                recorded in self.last_applied_at
+        """
+        tail = self._tail
+        if self._head == tail:
+            return
+        while self._head != tail:
+            function, args, put_time = self._slots[self._head]
+            self._slots[self._head] = None
+            self._pop()
+            function(*args)
+            self.applied += 1.0
+            self.last_latency = time.perf_counter() - put_time
+            if self.last_latency > self.worst_latency:
+                self.worst_latency = self.last_latency
+        self.last_applied_at = sample_time
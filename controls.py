@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+"""
+Random control values for the oscillators, generated ahead of time.
+"""
+
+import math
+import threading
+
+from chance.rand import WeightedDistribution, as_stream
+from ring import SpscRing
+
+
+class ControlStream(SpscRing):
+    """
+    A single-producer, single-consumer ring of pre-generated amp moves.
+
+    Each entry holds everything an oscillator needs when it refreshes its
+    amp elements: a move frequency, a drift target and a change rate drawn
+    from its weights, and an exponential variate for timing its next move.
+    A ControlProducer thread keeps the ring full, and the audio thread
+    takes one entry per move, so no sampling happens in the callback.
+
+    If the ring runs dry, next() draws synchronously and counts an
+    underflow, so the audio is never starved of values. Those draws come
+    from a separate stream spawned from rng, since a RandomStream must
+    only be used from one thread.
+    """
+
+    def __init__(self, move_freq_weights, drift_target_weights,
+                 change_rate_weights, capacity=128, rng=None):
+        """
+        Args:
+            move_freq_weights (list): Weights for WeightedDistribution
+            drift_target_weights (list): Weights for WeightedDistribution
+            change_rate_weights (list): Weights for WeightedDistribution
+            capacity (int): Most entries held at once, see SpscRing
+            rng (chance.rand.RandomStream): Defaults to the global random
+                module
+        """
+        SpscRing.__init__(self, capacity)
+        self.move_freq_weights = move_freq_weights
+        self.drift_target_weights = drift_target_weights
+        self.change_rate_weights = change_rate_weights
+        if rng is None:
+            self.rng = self._underflow_rng = None
+        else:
+            self.rng, self._underflow_rng = rng.spawn(2)
+        self._move_freq_distribution = WeightedDistribution(move_freq_weights)
+        self._drift_target_distribution = WeightedDistribution(
+            drift_target_weights)
+        self._change_rate_distribution = WeightedDistribution(
+            change_rate_weights)
+        self._move_freqs = [0.0] * self._size
+        self._drift_targets = [0.0] * self._size
+        self._change_rates = [0.0] * self._size
+        self._exponentials = [0.0] * self._size
+        self.underflows = 0.0
+
+        # The last entry taken by next()
+        self.move_freq = 0.0
+        self.drift_target = 0.0
+        self.change_rate = 0.0
+        self.exponential = 0.0
+        self.fill()
+
+    def draw(self, rng=None):
+        """
+        Args:
+            rng (chance.rand.RandomStream): Defaults to the global random
+                module
+
+        Returns: tuple of (move_freq, drift_target, change_rate, exponential)
+        """
+        return (float(self._move_freq_distribution.draw(rng=rng)),
+                float(self._drift_target_distribution.draw(rng=rng)),
+                float(self._change_rate_distribution.draw(rng=rng)),
+                -math.log(1 - as_stream(rng).random()))
+
+    def fill(self):
+        """
+        Generate entries until the ring is full. Producer only.
+
+        Returns: int, the number of entries added
+        """
+        added = 0
+        while not self._full():
+            tail = self._tail
+            (self._move_freqs[tail], self._drift_targets[tail],
+             self._change_rates[tail],
+             self._exponentials[tail]) = self.draw(self.rng)
+            self._push()
+            added += 1
+        return added
+
+    def next(self):
+        """
+        Take the next entry into self.move_freq, self.drift_target,
+        self.change_rate and self.exponential. Consumer only.
+        """
+        head = self._head
+        if head == self._tail:
+            self.underflows += 1.0
+            (self.move_freq, self.drift_target,
+             self.change_rate, self.exponential) = self.draw(
+                 self._underflow_rng)
+            return
+        self.move_freq = self._move_freqs[head]
+        self.drift_target = self._drift_targets[head]
+        self.change_rate = self._change_rates[head]
+        self.exponential = self._exponentials[head]
+        self._pop()
+
+
+class ControlProducer:
+    """
+    A background thread keeping ControlStreams full.
+    """
+
+    def __init__(self, streams, interval=0.05):
+        """
+        Args:
+            streams (list of ControlStream):
+            interval (float): Seconds between checks on the streams
+        """
+        self.streams = list(streams)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='ControlProducer')
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            for stream in self.streams:
+                stream.fill()
+            self._stopped.wait(self.interval)
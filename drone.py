@@ -1,12 +1,17 @@
 #!/usr/bin/env python
 
-import numpy
+import os
 import pyaudio
 import random
 import time
 import sys
 
-from chance.rand import weighted_rand
+from callback import make_callback
+from commands import CommandQueue
+from controls import ControlProducer
+from follower import EnvelopeFollower
+from monitor import CallbackMonitor
+from synth import SAMPLE_RATE, CHUNK_SIZE, build_bank
 
 # Make sure we're running the right version of Python
 if sys.version_info[0] == 3:
@@ -18,153 +23,25 @@ else:
     quit(1)
 
 
-SAMPLE_RATE = 44100
-CHUNK_SIZE = 1024
 STREAM_FORMAT = pyaudio.paFloat32
+# A quiet stage raises the drift targets by up to this much
+INPUT_INFLUENCE = 0.1
+MONITOR_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'callback_timing.log')
 
-frequency_map = {9: 440,  # A
-                 10: 466.16,  # A# / Bb
-                 11: 493.88,  # B
-                 0: 523.25,  # C
-                 1: 554.37,  # C# / Db
-                 2: 587.33,  # D
-                 3: 622.25,  # D# / Eb
-                 4: 659.26,  # E
-                 5: 698.46,  # F
-                 6: 739.99,  # F# / Gb
-                 7: 783.99,  # G
-                 8: 830.61}  # G# / Ab
-
-
-class Oscillator:
-    """
-    A sine wave oscillator.
-    """
-
-    def __init__(self, frequency, sample_rate,
-                 amp_factor=1, starting_amp=0,
-                 start_mode='OFF'):
-        """
-        Args:
-            frequency (float):
-            sample_rate (int):
-            starting_amp (float):
-            amp_factor (float):
-            start_mode (str): legal values: ON, OFF, STOPPING
-        """
-        self.frequency = frequency
-        self.sample_rate = sample_rate
-        self.last_played_sample = 0
-        self.play_mode = start_mode  # legal values: ON, OFF, STOPPING
-
-        # Build self.wave chunk, a numpy array of a full period of the wave
-        self.cache_length = round(self.sample_rate / self.frequency)
-        factor = self.frequency * (numpy.pi * 2) / self.sample_rate
-        self.wave_cache = numpy.sin(numpy.arange(self.cache_length) * factor)
-
-        # Set up amplitude
-        self._raw_amp = starting_amp
-        self.amp_factor = amp_factor
-        self.amp_drift_target_weights = [
-            (-0.3, 0), (0.1, 12), (0.2, 4), (0.3, 0)]
-        self.amp_drift_target = 0
-        self.amp_change_rate_weights = [(0.0001, 100), (0.001, 5), (0.01, 1)]
-        self.amp_change_rate = 0.000001
-        self.amp_move_freq_weights = [(0.001, 10), (0.01, 2)]
-        self.amp_move_freq = 0.0015
-
-    @property
-    def amp(self):
-        """
-        float: Adjusted amplitude. Negative values return 0
-        """
-        if self._raw_amp < 0:
-            return 0
-        else:
-            return self._raw_amp
-
-    @amp.setter
-    def amp(self, value):
-        self._raw_amp = value
-
-    def refresh_amp_elements(self):
-        self.amp_move_freq = weighted_rand(self.amp_move_freq_weights)
-        self.amp_drift_target = weighted_rand(self.amp_drift_target_weights)
-        self.amp_change_rate = weighted_rand(self.amp_change_rate_weights)
-
-    def step_amp(self):
-        if self.play_mode == 'OFF':
-            self.amp = 0
-        else:
-            if self.play_mode == 'ON':
-                # Roll for a chance to change the drift target and change rate
-                if random.uniform(0, 1) < self.amp_move_freq:
-                    self.refresh_amp_elements()
-                # step the amplitude
-                # target_amplitude = (((input_amp - 1) * -1) +
-                #                     self.amp_drift_target)
-                target_amplitude = self.amp_drift_target
-            elif self.play_mode == 'STOPPING':
-                self.amp_change_rate = 0.00015
-                target_amplitude = -1
-            else:
-                raise ValueError
-
-            difference = target_amplitude - self.amp
-            delta = self.amp_change_rate * numpy.sign(difference)
-            if self.amp > 0.5:
-                delta -= 0.001
-            self.amp += delta
-
-    def get_samples(self, sample_count):
-        """
-        Fetch a number of samples from self.wave_cache
-
-        Args:
-            sample_count (int): Number of samples to fetch
-
-        Returns: ndarray
-        """
-        rolled_array = numpy.roll(self.wave_cache, -1 * self.last_played_sample)
-        full_count, remainder = divmod(sample_count, self.cache_length)
-        final_subarray = rolled_array[:remainder]
-        return_array = numpy.concatenate((numpy.tile(rolled_array, full_count),
-                                          final_subarray))
-
-        self.last_played_sample = self.last_played_sample + remainder
-        if self.last_played_sample > self.cache_length:
-            self.last_played_sample -= self.cache_length
-        return return_array * (self.amp * self.amp_factor)
-
-
-def find_amplitude(chunk):
-    chunk = numpy.fromstring(chunk, numpy.float32)
-    return abs(chunk.max()) + abs(chunk.min()) / 2
-
-
-pitches = [
-    frequency_map[4] / 2.0,
-    frequency_map[4],
-    frequency_map[4] * 2.0
-    ]
-
-oscillators = [Oscillator(freq, SAMPLE_RATE,
-                          1, random.uniform(-8, 0))
-               for freq in pitches
-               ]
-
-
-def main_callback(in_data, frame_count, time_info, status):
-    # Get amplitude of input
-    # in_amplitude = find_amplitude(in_data)
-    subchunks = []
-    for osc in oscillators:
-        osc.step_amp()
-        subchunks.append(osc.get_samples(CHUNK_SIZE))
-    new_chunk = sum(subchunks)
-    # Play sound
-    return new_chunk.astype(numpy.float32).tostring(), pyaudio.paContinue
 
+bank = build_bank(SAMPLE_RATE, CHUNK_SIZE)
+bank.input_influence = INPUT_INFLUENCE
+follower = EnvelopeFollower(SAMPLE_RATE, CHUNK_SIZE)
+monitor = CallbackMonitor(CHUNK_SIZE, SAMPLE_RATE)
+# Changes to the bank from the Tk thread go through here
+commands = CommandQueue()
+# Draws new drift elements for the bank outside the audio thread
+producer = ControlProducer(bank.control_streams)
+producer.start()
+
+main_callback = make_callback(bank, follower, commands, monitor,
+                              pyaudio.paContinue)
 
 pa_host = pyaudio.PyAudio()
 out_stream = pyaudio.Stream(pa_host, format=STREAM_FORMAT,
@@ -202,11 +79,15 @@ timer_label.grid(row=2, column=0, sticky='SW')
 
 start_time = tk.DoubleVar(tk_host, 0, 'start_time')
 
+monitor_string = tk.StringVar(tk_host, '', 'Monitor')
+monitor_label = tk.Label(tk_host, textvariable=monitor_string)
+monitor_label.grid(row=2, column=1, columnspan=3, sticky='SE')
+
 
 def print_amps():
-    for osc in oscillators:
-        bar_length = int((osc.amp / 1) * 100)
-        print('{0}: {1}'.format(osc.frequency, '.' * bar_length))
+    for frequency, amp in zip(bank.frequencies, bank.amps):
+        bar_length = int((amp / 1) * 100)
+        print('{0}: {1}'.format(frequency, '.' * bar_length))
     print('============================================')
 
 
@@ -227,24 +108,34 @@ def increment_timer():
     tk_host.after(1000, increment_timer)
 
 
+def update_monitor():
+    monitor_string.set('{0}  cue {1:.0f} ms'.format(
+        monitor.summary(), commands.worst_latency * 1000))
+    tk_host.after(1000, update_monitor)
+
+
+def fade_in(raw_amps):
+    # Runs in the audio thread, see pause_resume_action
+    bank.raw_amps[:] = raw_amps
+    bank.set_play_mode('ON')
+
+
 def pause_resume_action():
-    for osc in oscillators:
-        if osc.play_mode == 'ON':
-            osc.play_mode = 'OFF'
-            play_pause_text.set('Play')
-        else:
-            osc.play_mode = 'ON'
-            play_pause_text.set('Pause')
-            # Set amplitudes to negative numbers so it fades back in
-            osc.amp = random.uniform(-3, 0)
-            if tk_host.getvar('start_time') == 0:
-                increment_timer()
+    # The button text tracks the play mode: 'Pause' means the drone is on
+    if play_pause_text.get() == 'Pause':
+        commands.put(bank.set_play_mode, 'OFF')
+        play_pause_text.set('Play')
+    else:
+        # Set amplitudes to negative numbers so it fades back in
+        commands.put(fade_in, [random.uniform(-3, 0) for osc in bank.oscillators])
+        play_pause_text.set('Pause')
+        if tk_host.getvar('start_time') == 0:
+            increment_timer()
 
 
 def fade_out_action():
-    for osc in oscillators:
-        osc.play_mode = 'STOPPING'
-        play_pause_text.set('Play')
+    commands.put(bank.set_play_mode, 'STOPPING')
+    play_pause_text.set('Play')
 
 
 def timer_reset_action():
@@ -258,6 +149,11 @@ def quit_action():
         return False
     out_stream.close()
     pa_host.terminate()
+    producer.stop()
+    monitor.dump(MONITOR_LOG, [
+        'Worst cue latency: {0:.1f} ms'.format(commands.worst_latency * 1000),
+        'Control stream underflows: {0}'.format(
+            int(sum(stream.underflows for stream in bank.control_streams)))])
     quit()
 
 
@@ -280,6 +176,7 @@ timer_reset_button.grid(row=1, column=2, sticky='S')
 quit_button = tk.Button(tk_host, text="Quit", command=quit_action)
 quit_button.grid(row=1, column=3, sticky='SE')
 
+update_monitor()
 tk_host.mainloop()
 
 while True:
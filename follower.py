@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+"""
+Following the loudness of the audio input.
+"""
+
+import math
+
+import numpy
+
+
+class EnvelopeFollower:
+    """
+    A block-based envelope follower for the stage microphone.
+
+    Each chunk of input is split into blocks of block_size samples, and the
+    level (RMS or peak) of every block is measured in one batched numpy
+    operation. The block levels are then smoothed with separate attack and
+    release times, giving one control value per block.
+    """
+
+    def __init__(self, sample_rate, chunk_size, block_size=64,
+                 attack=0.01, release=0.3, mode='rms'):
+        """
+        Args:
+            sample_rate (int):
+            chunk_size (int): Samples per input chunk, a multiple of block_size
+            block_size (int): Samples per control value
+            attack (float): Seconds to follow a rising level
+            release (float): Seconds to follow a falling level
+            mode (str): legal values: rms, peak
+        """
+        if chunk_size % block_size:
+            raise ValueError('chunk_size must be a multiple of block_size')
+        if mode not in ('rms', 'peak'):
+            raise ValueError("mode must be 'rms' or 'peak'")
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.mode = mode
+        self.attack_coefficient = 1 - math.exp(
+            -block_size / (attack * sample_rate))
+        self.release_coefficient = 1 - math.exp(
+            -block_size / (release * sample_rate))
+        self.level = 0.0
+
+        block_count = chunk_size // block_size
+        # Smoothed level at the end of each block of the last chunk, a view
+        # of self._levels
+        self._levels = numpy.zeros(block_count)
+        self.levels = self._levels
+        self._input = numpy.zeros(chunk_size, dtype=numpy.float32)
+        # The bytes of self._input, for copying PyAudio input straight in
+        self._input_bytes = memoryview(self._input).cast('B')
+        self._blocks = self._input.reshape(block_count, block_size)
+        self._scratch = numpy.zeros((block_count, block_size),
+                                    dtype=numpy.float32)
+        self._block_levels = numpy.zeros(block_count, dtype=numpy.float32)
+        # Peaks are found by folding the blocks in half over and over, since
+        # numpy's reductions allocate. The blocks are transposed first, so
+        # every fold is between two contiguous runs of rows.
+        self._transposed_blocks = self._blocks.T
+        self._peak_scratch = numpy.zeros((block_size, block_count),
+                                         dtype=numpy.float32)
+        self._peak_folds = []
+        rows = block_size
+        while rows > 1:
+            half = rows // 2
+            self._peak_folds.append((self._peak_scratch[:half],
+                                     self._peak_scratch[rows - half:rows]))
+            rows -= half
+        self._peaks = self._peak_scratch[0]
+        self._block_weights = numpy.full(block_size, 1 / block_size,
+                                         dtype=numpy.float32)
+
+    @property
+    def control_rate(self):
+        """
+        float: Control values produced per second
+        """
+        return self.sample_rate / self.block_size
+
+    def measure_blocks(self, samples):
+        """
+        Args:
+            samples (ndarray): float32 samples of one chunk
+
+        Returns: ndarray, the unsmoothed level of every block
+        """
+        # Skipping len() when process() has already copied the samples in,
+        # since lengths past 256 are allocated ints
+        if samples is not self._input:
+            if len(samples) != self.chunk_size:
+                usable = len(samples) - len(samples) % self.block_size
+                blocks = samples[:usable]
+                blocks = numpy.abs(blocks.reshape(-1, self.block_size))
+                if self.mode == 'rms':
+                    return numpy.sqrt((blocks * blocks).mean(axis=1))
+                return blocks.max(axis=1)
+            numpy.copyto(self._input, samples)
+        if self.mode == 'rms':
+            numpy.multiply(self._blocks, self._blocks, out=self._scratch)
+            numpy.dot(self._scratch, self._block_weights,
+                      out=self._block_levels)
+            numpy.sqrt(self._block_levels, out=self._block_levels)
+        else:
+            numpy.copyto(self._peak_scratch, self._transposed_blocks)
+            numpy.absolute(self._peak_scratch, out=self._peak_scratch)
+            fold = 0
+            while fold < len(self._peak_folds):
+                left, right = self._peak_folds[fold]
+                numpy.maximum(left, right, out=left)
+                fold += 1
+            numpy.copyto(self._block_levels, self._peaks)
+        return self._block_levels
+
+    def process(self, in_data):
+        """
+        Follow the envelope through one chunk of input
+
+        Args:
+            in_data (bytes or ndarray): float32 samples, as PyAudio passes them
+
+        Returns: float, the smoothed level at the end of the chunk
+        """
+        if in_data is None:
+            return self.level
+        if isinstance(in_data, numpy.ndarray):
+            samples = in_data
+        else:
+            try:
+                # Even a numpy view of in_data would allocate
+                self._input_bytes[:] = in_data
+                samples = self._input
+            except ValueError:
+                # Not one full chunk
+                samples = numpy.frombuffer(in_data, dtype=numpy.float32)
+        block_levels = self.measure_blocks(samples)
+        block_count = len(block_levels)
+        if block_count != len(self.levels):
+            if block_count > len(self._levels):
+                self._levels = numpy.zeros(block_count)
+            self.levels = self._levels[:block_count]
+        levels = self.levels
+        level = self.level
+        i = 0
+        # Read with item() in a while loop, since tolist(), numpy scalars
+        # and even an iterator would allocate
+        while i < block_count:
+            block_level = block_levels.item(i)
+            if block_level > level:
+                level += self.attack_coefficient * (block_level - level)
+            else:
+                level += self.release_coefficient * (block_level - level)
+            levels[i] = level
+            i += 1
+        self.level = level
+        return level
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+"""
+Timing instrumentation for the realtime audio callback.
+"""
+
+import time
+
+# PortAudio stream callback status flags, as exposed by pyaudio
+# (paInputUnderflow, paInputOverflow, paOutputUnderflow, paOutputOverflow)
+INPUT_UNDERFLOW = 1
+INPUT_OVERFLOW = 2
+OUTPUT_UNDERFLOW = 4
+OUTPUT_OVERFLOW = 8
+XRUN_FLAGS = ((INPUT_UNDERFLOW, 'input underflow'),
+              (INPUT_OVERFLOW, 'input overflow'),
+              (OUTPUT_UNDERFLOW, 'output underflow'),
+              (OUTPUT_OVERFLOW, 'output overflow'))
+
+
+class CallbackMonitor:
+    """
+    Records how long each audio callback takes against its deadline.
+
+    The deadline is the time it takes to play one chunk. Call start() when
+    the callback begins and stop(status) just before it returns.
+
+    Counters are kept as floats rather than ints: incrementing a large int
+    allocates a new object, while floats are recycled by the interpreter,
+    so recording a callback allocates nothing.
+    """
+
+    def __init__(self, chunk_size, sample_rate, bin_count=40, max_load=2.0):
+        """
+        Args:
+            chunk_size (int): Samples produced per callback
+            sample_rate (int):
+            bin_count (int): Number of histogram bins between 0 and max_load
+            max_load (float): Load, as a fraction of the deadline, covered
+                by the histogram. Slower callbacks land in a final bin.
+        """
+        self.deadline = chunk_size / sample_rate
+        self.bin_width = self.deadline * max_load / bin_count
+        self._last_bin = bin_count
+        self._start_time = 0.0
+        self.reset()
+
+    def reset(self):
+        self.callbacks = 0.0
+        self.total_time = 0.0
+        self.worst = 0.0
+        self.recent_load = 0.0
+        self.deadline_misses = 0.0
+        self.xruns = [0.0] * len(XRUN_FLAGS)
+        self.histogram = [0.0] * (self._last_bin + 1)
+
+    def start(self):
+        self._start_time = time.perf_counter()
+
+    def stop(self, status=0):
+        """
+        Args:
+            status (int): PortAudio status flags passed to the callback
+        """
+        self.record(time.perf_counter() - self._start_time, status)
+
+    def record(self, duration, status=0):
+        """
+        Args:
+            duration (float): Seconds the callback took
+            status (int): PortAudio status flags passed to the callback
+        """
+        self.callbacks += 1.0
+        self.total_time += duration
+        if duration > self.worst:
+            self.worst = duration
+        if duration > self.deadline:
+            self.deadline_misses += 1.0
+        self.recent_load += 0.05 * (duration / self.deadline - self.recent_load)
+        index = int(duration / self.bin_width)
+        if index > self._last_bin:
+            index = self._last_bin
+        self.histogram[index] += 1.0
+        # Unrolled, since even a loop's iterator would allocate
+        if status:
+            if status & INPUT_UNDERFLOW:
+                self.xruns[0] += 1.0
+            if status & INPUT_OVERFLOW:
+                self.xruns[1] += 1.0
+            if status & OUTPUT_UNDERFLOW:
+                self.xruns[2] += 1.0
+            if status & OUTPUT_OVERFLOW:
+                self.xruns[3] += 1.0
+
+    @property
+    def load(self):
+        """
+        float: Mean callback time as a percent of the deadline
+        """
+        if not self.callbacks:
+            return 0.0
+        return 100 * self.total_time / (self.callbacks * self.deadline)
+
+    @property
+    def worst_load(self):
+        """
+        float: Slowest callback time as a percent of the deadline
+        """
+        return 100 * self.worst / self.deadline
+
+    def summary(self):
+        """
+        Returns: str, one line suitable for a status display
+        """
+        return 'CPU {0:.0f}% (now {1:.0f}%, worst {2:.0f}%)  misses {3}  xruns {4}'.format(
+            self.load, 100 * self.recent_load, self.worst_load,
+            int(self.deadline_misses), int(sum(self.xruns)))
+
+    def report(self):
+        """
+        Returns: str, a multi-line report including the duration histogram
+        """
+        lines = ['Callbacks: {0}'.format(int(self.callbacks)),
+                 'Deadline: {0:.2f} ms'.format(self.deadline * 1000),
+                 'Mean load: {0:.1f}%'.format(self.load),
+                 'Worst: {0:.3f} ms ({1:.1f}%)'.format(
+                     self.worst * 1000, self.worst_load),
+                 'Deadline misses: {0}'.format(int(self.deadline_misses))]
+        for (flag, name), count in zip(XRUN_FLAGS, self.xruns):
+            lines.append('{0}: {1}'.format(name.capitalize(), int(count)))
+        lines.append('Callback durations:')
+        peak = max(self.histogram) or 1
+        for i, count in enumerate(self.histogram):
+            if not count:
+                continue
+            low = i * self.bin_width * 1000
+            if i == self._last_bin:
+                label = '>= {0:6.2f} ms'.format(low)
+            else:
+                label = '{0:6.2f}-{1:6.2f} ms'.format(
+                    low, low + self.bin_width * 1000)
+            lines.append('  {0} {1:8d} {2}'.format(
+                label, int(count), '#' * int(40 * count / peak)))
+        return '\n'.join(lines)
+
+    def dump(self, path, notes=()):
+        """
+        Append a timestamped report to the file at path
+
+        Args:
+            path (str):
+            notes (list of str): Extra lines to add after the report
+        """
+        with open(path, 'a') as log_file:
+            log_file.write('=== {0} ===\n'.format(time.strftime('%Y-%m-%d %H:%M:%S')))
+            log_file.write(self.report())
+            for note in notes:
+                log_file.write('\n' + note)
+            log_file.write('\n\n')
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+"""
+Checks that the faster ways of building networks agree with the plain ones.
+
+    python network_checks.py builder
+    python network_checks.py feather
+    python network_checks.py load
+
+Each check runs randomized cases from a fixed seed, and exits with an error
+describing the first case that disagrees.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+
+from chance import nodes
+from chance.network import CompiledNetwork, Network, NetworkBuilder, word_mine
+
+
+def _node_states(network, ordered=True):
+    """
+    Args:
+        network (chance.network.Network):
+        ordered (bool): Compare links in order, or sorted if False
+
+    Returns: list of tuples of every node's type, name, self_destruct, use
+        weight and (target name, weight) links
+    """
+    states = []
+    for node in network.node_list:
+        links = [(link.target.name, link.weight) for link in node.link_list]
+        if not ordered:
+            links.sort()
+        states.append((type(node).__name__, node.name, node.self_destruct,
+                       node.use_weight, links))
+    return states
+
+
+def check_builder(trials=300, seed=3):
+    """
+    Check that NetworkBuilder, fed a text in random pieces with snapshots in
+    between, finishes with the network word_mine mines from the whole text
+
+    Links are compared in order where word_mine's order is well defined,
+    which is when words aren't merged and all relationship keys are
+    positive, and sorted otherwise.
+
+    Args:
+        trials (int): Number of random texts and settings to try
+        seed (int):
+
+    Returns: int, the number of cases compared
+
+    Raises:
+        AssertionError: describing the first case that disagrees
+    """
+    rng = random.Random(seed)
+    words = ['the', 'cat', 'sat', '<held@>', 'a', '\n', 'x']
+    separators = [' ', ', ', '. ', '+', ' ', ' - ']
+    weight_sets = [None, {1: 5, -2: 3, 0: 1, 3: 0, 4: 2}, {-3: 7, 2: 1},
+                   {1: 1}]
+    compared = 0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'text.txt')
+        for trial in range(trials):
+            text = ''.join(rng.choice(words) + rng.choice(separators)
+                           for i in range(rng.choice([0, 1, 2, 3, 5, 8, 20,
+                                                      60])))
+            if rng.random() < 0.5:
+                text = text.rstrip()
+            weights = rng.choice(weight_sets)
+            merge = rng.random() < 0.5
+            allow_self_links = rng.random() < 0.5
+            with open(path, 'w') as text_file:
+                text_file.write(text)
+            try:
+                expected = word_mine(path, weights, allow_self_links, merge)
+            except IndexError:
+                # word_mine can't merge words in texts shorter than its reach
+                continue
+            builder = NetworkBuilder(weights, allow_self_links, merge)
+            start = 0
+            for end in sorted(rng.sample(range(len(text) + 1),
+                                         min(len(text) + 1, 4))) + [len(text)]:
+                builder.feed(text[start:end])
+                builder.snapshot()
+                start = end
+            ordered = not merge and (weights is None or
+                                     all(key > 0 for key in weights))
+            assert (_node_states(builder.finalize(), ordered) ==
+                    _node_states(expected, ordered)), (
+                'NetworkBuilder differs from word_mine for {0!r} with '
+                'relationship_weights={1}, allow_self_links={2}, '
+                'merge_same_words={3}'.format(text, weights,
+                                              allow_self_links, merge))
+            compared += 1
+    return compared
+
+
+def _feather_reference(network, factor, include_self):
+    """
+    Feather network's links one node at a time, adding the weights of the
+    links of every node a node links to, as read before any were changed
+
+    Args:
+        network (chance.network.Network):
+        factor (float):
+        include_self (bool): Also branch through links to nodes with the
+            node's own name
+    """
+    before = dict((node, [(link.target, link.weight)
+                          for link in node.link_list])
+                  for node in CompiledNetwork(network).nodes)
+    for node in network.node_list:
+        for branch, _ in before[node]:
+            if not include_self and branch.name == node.name:
+                continue
+            for target, weight in before[branch]:
+                link = node.find_link(target)
+                if link:
+                    link.weight += weight * factor
+                else:
+                    node.add_link(target, weight * factor)
+
+
+def _indexed_links(network):
+    """
+    Returns: list of every node's links as (index of the target in
+        node_list or -1, weight) tuples, comparable across networks
+    """
+    indices = dict((node, i) for i, node in enumerate(network.node_list))
+    return [[(indices.get(link.target, -1), link.weight)
+             for link in node.link_list] for node in network.node_list]
+
+
+def _links_close(expected, actual):
+    return len(expected) == len(actual) and all(
+        len(expected_links) == len(actual_links) and all(
+            expected_target == actual_target and
+            math.isclose(expected_weight, actual_weight, rel_tol=1e-9,
+                         abs_tol=1e-9)
+            for (expected_target, expected_weight),
+            (actual_target, actual_weight) in zip(expected_links,
+                                                  actual_links))
+        for expected_links, actual_links in zip(expected, actual))
+
+
+def check_feather(trials=60, seed=5, factor=0.01):
+    """
+    Check that Network.feather_links, whatever block size it expands links
+    in, matches feathering one node at a time on the same mined network
+
+    Links must come out in the same order with weights equal to within
+    floating point rounding.
+
+    Args:
+        trials (int): Number of random texts and settings to try
+        seed (int):
+        factor (float): Passed to feather_links
+
+    Returns: int, the number of cases compared
+
+    Raises:
+        AssertionError: describing the first case that disagrees
+    """
+    rng = random.Random(seed)
+    words = ['a', 'b', 'c', 'd', 'e', 'a', 'b']
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'text.txt')
+        for trial in range(trials):
+            # Long enough for word_mine to merge words
+            text = ' '.join(rng.choice(words)
+                            for i in range(rng.randint(16, 60)))
+            merge = trial % 2 == 0
+            include_self = trial % 3 == 0
+            block_size = rng.choice([1, 3, 50, 1 << 22])
+            with open(path, 'w') as text_file:
+                text_file.write(text)
+            expected = word_mine(path, merge_same_words=merge)
+            _feather_reference(expected, factor, include_self)
+            actual = word_mine(path, merge_same_words=merge)
+            actual.feather_links(factor, include_self, block_size=block_size)
+            assert _links_close(_indexed_links(expected),
+                                _indexed_links(actual)), (
+                'feather_links differs from feathering one node at a time '
+                'for {0!r} with merge_same_words={1}, include_self={2}, '
+                'block_size={3}'.format(text, merge, include_self,
+                                        block_size))
+    return trials
+
+
+def _built_link_lists(network):
+    """
+    Returns: int, how many nodes of a network read by Network.load() have
+        had their link_list made from the file
+    """
+    return sum('link_list' in vars(node) for node in network.compiled.nodes)
+
+
+def check_load(trials=20, seed=7):
+    """
+    Check that a network read by Network.load() stays compiled, without
+    making any node's links, while other networks are mined and edited, and
+    that editing one of its own nodes does drop its compiled form
+
+    Args:
+        trials (int): Number of other networks to mine and edit
+        seed (int):
+
+    Returns: int, the number of other networks edited
+
+    Raises:
+        AssertionError: describing the first edit that drops the compiled
+            form, or the own edit that doesn't
+    """
+    rng = random.Random(seed)
+    words = ['the', 'cat', 'sat', 'on', 'a', 'mat']
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, 'text.txt')
+        network_path = os.path.join(directory, 'network.npz')
+        with open(text_path, 'w') as text_file:
+            text_file.write(' '.join(rng.choice(words) for i in range(500)))
+        word_mine(text_path).save(network_path)
+        loaded = Network.load(network_path)
+        compiled = loaded.compiled
+        for trial in range(trials):
+            other = word_mine(text_path, merge_same_words=trial % 2 == 0)
+            other.compile()
+            source, target = rng.sample(other.node_list, 2)
+            source.add_link(target, rng.random())
+            source.link_list[0].weight += 1
+            target.use_weight += 1
+            other.transform_links(noise=0.1)
+            other.walk_chains(2, 10)
+            nodes.Word('x').add_link(nodes.Word('y'))
+            loaded.walk_chains(2, 10)
+            assert loaded.compiled is compiled, (
+                'Editing another network dropped the compiled form of a '
+                'loaded one, on trial {0}'.format(trial))
+            assert _built_link_lists(loaded) == 0, (
+                'Walking a loaded network made link lists from the file')
+        loaded.node_list[0].use_weight += 1
+        loaded.walk_chains(2, 10)
+        assert loaded.compiled is not compiled, (
+            'Editing a node of a loaded network kept its old compiled form')
+    return trials
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Check faster network building against the plain way.')
+    subparsers = parser.add_subparsers(dest='command')
+    builder_parser = subparsers.add_parser(
+        'builder', help='NetworkBuilder against word_mine')
+    builder_parser.add_argument('--trials', type=int, default=300)
+    builder_parser.add_argument('--seed', type=int, default=3)
+    feather_parser = subparsers.add_parser(
+        'feather', help='Network.feather_links against one node at a time')
+    feather_parser.add_argument('--trials', type=int, default=60)
+    feather_parser.add_argument('--seed', type=int, default=5)
+    load_parser = subparsers.add_parser(
+        'load', help='loaded networks stay compiled while others change')
+    load_parser.add_argument('--trials', type=int, default=20)
+    load_parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'builder':
+            print('{0} cases match'.format(
+                check_builder(args.trials, args.seed)))
+        elif args.command == 'feather':
+            print('{0} cases match'.format(
+                check_feather(args.trials, args.seed)))
+        elif args.command == 'load':
+            print('stayed compiled through {0} other networks'.format(
+                check_load(args.trials, args.seed)))
+        else:
+            parser.print_help()
+    except AssertionError as error:
+        sys.exit(error)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+"""
+Renders the drone offline to a WAV file, as fast as the CPU allows.
+
+This uses the same synthesis path as drone.py, but needs neither PyAudio
+nor Tk, so it can run on machines without a sound card or a display.
+
+    python render.py rehearsal.wav 600
+
+Other chords can be rendered too, for example a detuned C major triad
+in two octaves, three voices to a pitch:
+
+    python render.py triad.wav 60 --pitch-classes 0 4 7 --octaves -1 0 \\
+        --unison 3 --detune 12 --amp-factor 0.1
+"""
+
+import argparse
+import time
+import wave
+
+import numpy
+
+from chance.rand import RandomStream
+from synth import (SAMPLE_RATE, CHUNK_SIZE, build_bank, chord_frequencies,
+                   pitches)
+
+
+class RenderResult:
+    def __init__(self, path, frame_count, sample_rate, elapsed):
+        """
+        Args:
+            path (str): Path of the written WAV file
+            frame_count (int): Number of frames written
+            sample_rate (int):
+            elapsed (float): Wall clock seconds spent rendering
+        """
+        self.path = path
+        self.frame_count = frame_count
+        self.sample_rate = sample_rate
+        self.elapsed = elapsed
+
+    @property
+    def duration(self):
+        """
+        float: Seconds of audio rendered
+        """
+        return self.frame_count / self.sample_rate
+
+    @property
+    def realtime_factor(self):
+        """
+        float: Seconds of audio rendered per wall clock second
+        """
+        if self.elapsed <= 0:
+            return float('inf')
+        return self.duration / self.elapsed
+
+    def __str__(self):
+        return 'Rendered {0:.1f} s to {1} in {2:.3f} s ({3:.1f}x realtime)'.format(
+            self.duration, self.path, self.elapsed, self.realtime_factor)
+
+
+def to_pcm16(chunk):
+    """
+    Convert a float chunk in [-1, 1] to little-endian 16 bit PCM bytes
+
+    Args:
+        chunk (ndarray): float samples, clipped if out of range
+
+    Returns: bytes
+    """
+    clipped = numpy.clip(chunk, -1, 1)
+    return (clipped * 32767).astype('<i2').tobytes()
+
+
+def render(path, seconds, bank=None,
+           sample_rate=SAMPLE_RATE, chunk_size=CHUNK_SIZE):
+    """
+    Render ``seconds`` of the drone into a mono 16 bit WAV file at ``path``
+
+    Args:
+        path (str):
+        seconds (float): Length of audio to render
+        bank (OscillatorBank): Defaults to a freshly built drone that is
+            already playing, with a chunk size of chunk_size
+        sample_rate (int):
+        chunk_size (int): Samples generated per step, as in the live callback
+
+    Returns: RenderResult
+    """
+    if bank is None:
+        bank = build_bank(sample_rate, chunk_size, start_mode='ON')
+    total_frames = int(round(seconds * sample_rate))
+    written = 0
+    wav_file = wave.open(path, 'wb')
+    try:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        start = time.perf_counter()
+        while written < total_frames:
+            chunk = bank.next_chunk(chunk_size)
+            remaining = total_frames - written
+            if remaining < chunk_size:
+                chunk = chunk[:remaining]
+            wav_file.writeframesraw(to_pcm16(chunk))
+            written += len(chunk)
+        elapsed = time.perf_counter() - start
+    finally:
+        wav_file.close()
+    return RenderResult(path, written, sample_rate, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Render the drone offline to a WAV file.')
+    parser.add_argument('path', help='output WAV file')
+    parser.add_argument('seconds', type=float, help='length to render')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='samples per synthesis step (default %(default)s)')
+    parser.add_argument('--pitch-classes', type=int, nargs='+',
+                        help='keys of frequency_map to play instead of the '
+                             "drone's own pitches")
+    parser.add_argument('--octaves', type=int, nargs='+', default=[0],
+                        help='octave shifts of the pitch classes')
+    parser.add_argument('--unison', type=int, default=1,
+                        help='voices per pitch')
+    parser.add_argument('--detune', type=float, default=0,
+                        help='width of each unison cluster in cents')
+    parser.add_argument('--amp-factor', type=float, default=1,
+                        help='amp factor of every voice')
+    parser.add_argument('--seed', type=int,
+                        help='seed for a reproducible render')
+    args = parser.parse_args(argv)
+    if args.pitch_classes is None:
+        frequencies = pitches
+    else:
+        frequencies = chord_frequencies(args.pitch_classes, args.octaves,
+                                        args.unison, args.detune)
+    rng = None if args.seed is None else RandomStream(args.seed)
+    bank = build_bank(SAMPLE_RATE, args.chunk_size, start_mode='ON',
+                      frequencies=frequencies, amp_factors=args.amp_factor,
+                      rng=rng)
+    print(render(args.path, args.seconds, bank,
+                 chunk_size=args.chunk_size))
+
+
+if __name__ == '__main__':
+    main()
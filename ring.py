@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""
+The ring buffer shared by the queues feeding the audio thread.
+"""
+
+
+class SpscRing:
+    """
+    The indices of a single-producer, single-consumer ring.
+
+    Subclasses keep their entries in lists of self._size slots, which the
+    producer fills at self._tail and the consumer reads at self._head. Each
+    index is written by only one side, and list item and attribute
+    assignment are atomic in CPython, so neither side ever takes a lock.
+
+    The capacity is kept at or below 256 so the indices stay cached small
+    ints, and using the ring from the audio thread allocates nothing.
+    """
+
+    def __init__(self, capacity):
+        """
+        Args:
+            capacity (int): Most entries held at once
+        """
+        if not 0 < capacity <= 256:
+            raise ValueError('capacity must be between 1 and 256')
+        # One slot is always left empty to tell a full ring from an empty one
+        self._size = capacity + 1
+        self._head = 0
+        self._tail = 0
+
+    def __len__(self):
+        return (self._tail - self._head) % self._size
+
+    def _full(self):
+        return (self._tail + 1) % self._size == self._head
+
+    def _push(self):
+        """
+        Publish the slot at self._tail as filled. Producer only.
+        """
+        self._tail = (self._tail + 1) % self._size
+
+    def _pop(self):
+        """
+        Publish the slot at self._head as free, once it has been read.
+        Consumer only.
+        """
+        self._head = (self._head + 1) % self._size
@@ -0,0 +1,680 @@
+#!/usr/bin/env python
+
+import math
+
+import numpy
+
+from chance.rand import as_stream, weighted_rand
+from controls import ControlStream
+
+
+SAMPLE_RATE = 44100
+CHUNK_SIZE = 1024
+
+frequency_map = {9: 440,  # A
+                 10: 466.16,  # A# / Bb
+                 11: 493.88,  # B
+                 0: 523.25,  # C
+                 1: 554.37,  # C# / Db
+                 2: 587.33,  # D
+                 3: 622.25,  # D# / Eb
+                 4: 659.26,  # E
+                 5: 698.46,  # F
+                 6: 739.99,  # F# / Gb
+                 7: 783.99,  # G
+                 8: 830.61}  # G# / Ab
+
+PLAY_MODES = ('OFF', 'ON', 'STOPPING')
+
+# Amplitude change rates are given per this many samples
+AMP_STEP_SAMPLES = 1024
+STOPPING_CHANGE_RATE = 0.00015
+# Extra downward amp change, per AMP_STEP_SAMPLES, for amplitudes above 0.5
+CEILING_CHANGE_RATE = 0.001
+
+# Samples in one period of the shared wave table. A power of two, so that
+# wrapping a table index is a bitwise and.
+WAVE_TABLE_SIZE = 4096
+# One period of a sine wave shared by every oscillator, with the first sample
+# repeated at the end so interpolating never has to wrap
+SINE_TABLE = numpy.sin(numpy.arange(WAVE_TABLE_SIZE + 1) *
+                       (2 * numpy.pi / WAVE_TABLE_SIZE)).astype(numpy.float32)
+# Difference between each sample of SINE_TABLE and the next
+SINE_SLOPES = numpy.diff(SINE_TABLE)
+
+# Most voices an OscillatorBank renders together
+BATCH_SIZE = 64
+
+
+class Oscillator:
+    """
+    A sine wave oscillator.
+    """
+
+    def __init__(self, frequency, sample_rate,
+                 amp_factor=1, starting_amp=0,
+                 start_mode='OFF', rng=None):
+        """
+        Args:
+            frequency (float):
+            sample_rate (int):
+            starting_amp (float):
+            amp_factor (float):
+            start_mode (str): legal values: ON, OFF, STOPPING
+            rng (chance.rand.RandomStream): Defaults to the global random
+                module
+        """
+        self.frequency = frequency
+        self.rng = rng
+        self.sample_rate = sample_rate
+        self.play_mode = start_mode  # legal values: ON, OFF, STOPPING
+
+        # Position in SINE_TABLE, in fractional table samples, and how far
+        # it moves per output sample
+        self.phase = 0.0
+        self.phase_increment = frequency * WAVE_TABLE_SIZE / sample_rate
+
+        # Set up amplitude
+        self._raw_amp = starting_amp
+        self.amp_factor = amp_factor
+        self.amp_drift_target_weights = [
+            (-0.3, 0), (0.1, 12), (0.2, 4), (0.3, 0)]
+        self.amp_drift_target = 0
+        self.amp_change_rate_weights = [(0.0001, 100), (0.001, 5), (0.01, 1)]
+        self.amp_change_rate = 0.000001
+        self.amp_move_freq_weights = [(0.001, 10), (0.01, 2)]
+        self.amp_move_freq = 0.0015
+
+    @property
+    def amp(self):
+        """
+        float: Adjusted amplitude. Negative values return 0
+        """
+        if self._raw_amp < 0:
+            return 0
+        else:
+            return self._raw_amp
+
+    @amp.setter
+    def amp(self, value):
+        self._raw_amp = value
+
+    def refresh_amp_elements(self):
+        self.amp_move_freq = weighted_rand(self.amp_move_freq_weights,
+                                           rng=self.rng)
+        self.amp_drift_target = weighted_rand(self.amp_drift_target_weights,
+                                              rng=self.rng)
+        self.amp_change_rate = weighted_rand(self.amp_change_rate_weights,
+                                             rng=self.rng)
+
+    def step_amp(self, input_level=0, input_influence=0):
+        """
+        Args:
+            input_level (float): Level of the audio input, 0 to 1
+            input_influence (float): How far a quiet input raises the drift
+                target. 1 gives the original target of
+                (1 - input_level) + amp_drift_target.
+        """
+        if self.play_mode == 'OFF':
+            self.amp = 0
+        else:
+            if self.play_mode == 'ON':
+                # Roll for a chance to change the drift target and change rate
+                if as_stream(self.rng).uniform(0, 1) < self.amp_move_freq:
+                    self.refresh_amp_elements()
+                # step the amplitude
+                target_amplitude = (input_influence * (1 - input_level) +
+                                    self.amp_drift_target)
+            elif self.play_mode == 'STOPPING':
+                self.amp_change_rate = STOPPING_CHANGE_RATE
+                target_amplitude = -1
+            else:
+                raise ValueError
+
+            difference = target_amplitude - self.amp
+            delta = self.amp_change_rate * numpy.sign(difference)
+            if self.amp > 0.5:
+                delta -= CEILING_CHANGE_RATE
+            self.amp += delta
+
+    def get_samples(self, sample_count):
+        """
+        Fetch a number of samples from SINE_TABLE
+
+        Args:
+            sample_count (int): Number of samples to fetch
+
+        Returns: ndarray
+        """
+        positions = (self.phase +
+                     self.phase_increment * numpy.arange(sample_count))
+        return_array = read_wave_table(SINE_TABLE, positions)
+        self.phase = ((self.phase + self.phase_increment * sample_count) %
+                      WAVE_TABLE_SIZE)
+        return return_array * (self.amp * self.amp_factor)
+
+
+def read_wave_table(table, positions):
+    """
+    Read a wave table at fractional positions with linear interpolation
+
+    Args:
+        table (ndarray): One period of WAVE_TABLE_SIZE samples, followed by
+            the first sample again
+        positions (ndarray): Non-negative positions in table samples. They
+            may run past the end of the period, and wrap around.
+
+    Returns: ndarray
+    """
+    floors = numpy.floor(positions)
+    fractions = (positions - floors).astype(table.dtype)
+    indices = floors.astype(numpy.intp) & (WAVE_TABLE_SIZE - 1)
+    return table[indices] + fractions * (table[indices + 1] - table[indices])
+
+
+class OscillatorBank:
+    """
+    A group of oscillators rendered together in batched numpy operations.
+
+    Every voice reads the shared SINE_TABLE with its own fractional phase
+    increment, so any frequency plays in tune and memory does not grow
+    with the number of pitches. Every voice's phase is kept in one array.
+    Voices are rendered batch_size at a time: each batch is one
+    interpolated read into a 2D (voice, sample) buffer, mixed straight
+    into the output, so working memory stays the size of one batch
+    however many voices there are.
+
+    Amplitude state (play mode, drift target, change rate, move
+    frequency) is copied out of the Oscillators into per-voice arrays
+    when the bank is built, and from then on lives in the bank. Each
+    chunk the amplitude follows the same drift rules as
+    Oscillator.step_amp, but as a per-sample linear ramp for all voices
+    at once, so chunk boundaries no longer step.
+
+    The audio input can push the drift targets around: set input_level
+    to the current level of the input (see follower.EnvelopeFollower) and
+    input_influence to how far a quiet input raises the targets, as in
+    Oscillator.step_amp.
+
+    New drift elements are taken from control_streams, one ControlStream
+    for every distinct set of weights among the oscillators, rather than
+    drawn with weighted_rand while rendering. Run a
+    controls.ControlProducer on control_streams to keep them full.
+
+    Every array a full chunk needs is allocated up front, and rendering
+    a full chunk only writes into them, so the audio thread does no
+    allocation after warm-up (see benchmark.py allocations).
+    """
+
+    def __init__(self, oscillators, chunk_size=CHUNK_SIZE,
+                 batch_size=BATCH_SIZE, rng=None):
+        """
+        Args:
+            oscillators (list of Oscillator):
+            chunk_size (int): Largest number of samples rendered at once
+            batch_size (int): Most voices rendered together
+            rng (chance.rand.RandomStream): Seeds the control streams,
+                each of which spawns its own. Defaults to the global
+                random module.
+        """
+        self.oscillators = list(oscillators)
+        self.rng = rng
+        self.chunk_size = chunk_size
+        voice_count = len(self.oscillators)
+        self.batch_size = max(1, min(batch_size, voice_count))
+
+        self.frequencies = numpy.array(
+            [osc.frequency for osc in self.oscillators], dtype=float)
+        self.phase_increments = numpy.array(
+            [osc.phase_increment for osc in self.oscillators], dtype=float)
+        self.phases = numpy.array(
+            [osc.phase for osc in self.oscillators], dtype=float)
+
+        # Amplitude state, one entry per voice
+        self.raw_amps = numpy.array(
+            [osc._raw_amp for osc in self.oscillators], dtype=float)
+        self.amp_factors = numpy.array(
+            [osc.amp_factor for osc in self.oscillators], dtype=float)
+        self.amp_drift_targets = numpy.array(
+            [osc.amp_drift_target for osc in self.oscillators], dtype=float)
+        self.amp_change_rates = numpy.array(
+            [osc.amp_change_rate for osc in self.oscillators], dtype=float)
+        self.amp_move_freqs = numpy.array(
+            [osc.amp_move_freq for osc in self.oscillators], dtype=float)
+        self.play_modes = numpy.zeros(voice_count, dtype=numpy.intp)
+        self._stopping = numpy.zeros(voice_count, dtype=bool)
+        self._off = numpy.zeros(voice_count, dtype=bool)
+        for voice, osc in enumerate(self.oscillators):
+            self.set_play_mode(osc.play_mode, voice)
+
+        # Pre-generated drift elements, shared by voices with equal weights
+        self.control_streams = []
+        self._voice_streams = []
+        streams_by_weights = {}
+        for osc in self.oscillators:
+            weights = (tuple(osc.amp_move_freq_weights),
+                       tuple(osc.amp_drift_target_weights),
+                       tuple(osc.amp_change_rate_weights))
+            if weights not in streams_by_weights:
+                if rng is None:
+                    stream_rng = None
+                else:
+                    stream_rng = rng.spawn(1)[0]
+                streams_by_weights[weights] = ControlStream(
+                    osc.amp_move_freq_weights, osc.amp_drift_target_weights,
+                    osc.amp_change_rate_weights, rng=stream_rng)
+                self.control_streams.append(streams_by_weights[weights])
+            self._voice_streams.append(streams_by_weights[weights])
+
+        # Sample clock and the time each voice next rolls new drift elements
+        self.samples_played = 0.0
+        self.move_times = numpy.zeros(voice_count)
+        for voice in range(voice_count):
+            self.move_times[voice] = self._roll_move_time(voice)
+        self._next_move_time = float(self.move_times.min(initial=numpy.inf))
+
+        self.input_level = 0.0
+        self.input_influence = 0.0
+
+        # Preallocated working arrays for a full chunk
+        self.output = numpy.zeros(chunk_size, dtype=numpy.float32)
+        self._ramp_mix = numpy.zeros(chunk_size, dtype=numpy.float32)
+        self._batch_mix = numpy.zeros(chunk_size, dtype=numpy.float32)
+        self._ramp = (numpy.arange(1, chunk_size + 1) /
+                      chunk_size).astype(numpy.float32)
+        self._chunk_advances = self.phase_increments * chunk_size
+        self._start_gains = numpy.zeros(voice_count, dtype=numpy.float32)
+        self._gain_deltas = numpy.zeros(voice_count, dtype=numpy.float32)
+        self._batches = _VoiceBatch.split(self, self.batch_size)
+        self._table_size = numpy.array(float(WAVE_TABLE_SIZE))
+        self._table_mask = numpy.array(WAVE_TABLE_SIZE - 1, dtype=numpy.intp)
+        self._chunk_scale = numpy.array(chunk_size / AMP_STEP_SAMPLES)
+        self._current = numpy.zeros(voice_count)
+        self._targets = numpy.zeros(voice_count)
+        self._difference = numpy.zeros(voice_count)
+        self._step = numpy.zeros(voice_count)
+        self._scratch = numpy.zeros(voice_count)
+        self._ceiling = numpy.zeros(voice_count, dtype=bool)
+        self._amp_deltas = numpy.zeros(voice_count)
+        self._zero = numpy.array(0.0)
+        self._half = numpy.array(0.5)
+        self._minus_one = numpy.array(-1.0)
+        self._input_offset = numpy.array(0.0)
+        self._ceiling_rate = numpy.array(CEILING_CHANGE_RATE)
+
+    def __len__(self):
+        return len(self.oscillators)
+
+    @property
+    def amps(self):
+        """
+        ndarray: Adjusted amplitude of every voice. Negative values return 0
+        """
+        return numpy.maximum(self.raw_amps, 0)
+
+    def get_play_mode(self, voice):
+        """
+        Args:
+            voice (int): Index of the voice
+
+        Returns: str, one of ON, OFF, STOPPING
+        """
+        return PLAY_MODES[self.play_modes[voice]]
+
+    def set_play_mode(self, mode, voices=None):
+        """
+        Args:
+            mode (str): legal values: ON, OFF, STOPPING
+            voices (int or list of int): Voices to change, defaults to all
+        """
+        if voices is None:
+            voices = slice(None)
+        self.play_modes[voices] = PLAY_MODES.index(mode)
+        self._stopping[voices] = mode == 'STOPPING'
+        self._off[voices] = mode == 'OFF'
+        if mode == 'STOPPING':
+            self.amp_change_rates[voices] = STOPPING_CHANGE_RATE
+
+    def refresh_amp_elements(self, voice):
+        """
+        Take a new drift target, change rate and move frequency for a voice
+        from its control stream
+
+        Args:
+            voice (int): Index of the voice
+        """
+        stream = self._voice_streams[voice]
+        stream.next()
+        self.amp_move_freqs[voice] = stream.move_freq
+        self.amp_drift_targets[voice] = stream.drift_target
+        self.amp_change_rates[voice] = stream.change_rate
+
+    def _roll_move_time(self, voice, exponential=None):
+        """
+        Roll the sample time at which a voice next refreshes its amp elements
+
+        Rolling against amp_move_freq once every AMP_STEP_SAMPLES samples
+        is a geometric process, so the wait until the next success can be
+        drawn once up front instead of rolling on every chunk.
+
+        Args:
+            voice (int): Index of the voice
+            exponential (float): A standard exponential variate to draw the
+                wait from. Defaults to a fresh one.
+
+        Returns: float
+        """
+        move_freq = self.amp_move_freqs.item(voice)
+        if move_freq <= 0:
+            return numpy.inf
+        if move_freq >= 1:
+            steps = 1.0
+        else:
+            if exponential is None:
+                exponential = -math.log(1 - as_stream(self.rng).random())
+            # Rounded up in floats, since ints past 256 would be allocated
+            steps = -(-exponential / -math.log(1 - move_freq) // 1.0)
+            if steps < 1.0:
+                steps = 1.0
+        return self.samples_played + steps * AMP_STEP_SAMPLES
+
+    def _move_due_voices(self):
+        """
+        Refresh the amp elements of every playing voice whose move time has
+        passed, and roll the next move time of every voice that was due
+
+        Each due voice takes one entry from its control stream, whether or
+        not it is playing, so the wait is never drawn in the callback.
+
+        The voices are scanned in plain Python, reading elements with
+        item(), since numpy indices and scalars would be allocated.
+        """
+        samples_played = self.samples_played
+        next_move_time = numpy.inf
+        voice = 0
+        # A while loop, since even an iterator over the voices would allocate
+        while voice < len(self.move_times):
+            move_time = self.move_times.item(voice)
+            if move_time <= samples_played:
+                stream = self._voice_streams[voice]
+                if self.play_modes.item(voice) == PLAY_MODES.index('ON'):
+                    self.refresh_amp_elements(voice)
+                else:
+                    stream.next()
+                move_time = self._roll_move_time(voice, stream.exponential)
+                self.move_times[voice] = move_time
+            if move_time < next_move_time:
+                next_move_time = move_time
+            voice += 1
+        self._next_move_time = next_move_time
+
+    def step_amps(self, sample_count):
+        """
+        Advance every voice's amplitude by sample_count samples
+
+        Rates and move frequencies are expressed per AMP_STEP_SAMPLES
+        samples, the chunk size step_amp was originally tuned at, so the
+        drift keeps the same pace whatever the chunk size.
+
+        Args:
+            sample_count (int):
+
+        Returns: ndarray, the change in raw amplitude of every voice
+        """
+        if self.samples_played >= self._next_move_time:
+            self._move_due_voices()
+        if sample_count == self.chunk_size:
+            scale = self._chunk_scale
+        else:
+            scale = numpy.array(sample_count / AMP_STEP_SAMPLES)
+
+        current = numpy.maximum(self.raw_amps, self._zero, out=self._current)
+        targets = self._targets
+        numpy.copyto(targets, self.amp_drift_targets)
+        if self.input_influence:
+            self._input_offset.fill(
+                self.input_influence * (1 - self.input_level))
+            targets += self._input_offset
+        numpy.putmask(targets, self._stopping, self._minus_one)
+        difference = numpy.subtract(targets, current, out=self._difference)
+
+        # Settle on the target instead of overshooting it
+        step = numpy.multiply(self.amp_change_rates, scale, out=self._step)
+        distance = numpy.subtract(targets, self.raw_amps, out=self._scratch)
+        numpy.absolute(distance, out=distance)
+        numpy.minimum(step, distance, out=step)
+
+        deltas = numpy.sign(difference, out=self._amp_deltas)
+        deltas *= step
+        numpy.greater(current, self._half, out=self._ceiling)
+        numpy.multiply(self._ceiling_rate, scale, out=self._scratch)
+        numpy.subtract(deltas, self._scratch, out=self._scratch)
+        numpy.putmask(deltas, self._ceiling, self._scratch)
+        numpy.negative(self.raw_amps, out=self._scratch)
+        numpy.putmask(deltas, self._off, self._scratch)
+        return deltas
+
+    def _render_batch(self, batch):
+        """
+        Render the bare waves of a batch of voices for a full chunk
+
+        This is the same interpolated read as read_wave_table, done in the
+        batch's preallocated arrays.
+
+        Args:
+            batch (_VoiceBatch):
+
+        Returns: ndarray of shape (batch voice count, self.chunk_size)
+        """
+        positions = batch.positions
+        numpy.copyto(positions, batch.phase_increments)
+        positions *= batch.sample_indices
+        numpy.copyto(batch.floors, batch.phases)
+        positions += batch.floors
+        # Split positions into table indices and the fraction between them
+        numpy.floor(positions, out=batch.floors)
+        positions -= batch.floors
+        numpy.copyto(batch.fractions, positions, casting='same_kind')
+        numpy.copyto(batch.indices, batch.floors, casting='unsafe')
+        numpy.bitwise_and(batch.indices, self._table_mask, out=batch.indices)
+        SINE_TABLE.take(batch.indices, out=batch.waves, mode='clip')
+        SINE_SLOPES.take(batch.indices, out=batch.slopes, mode='clip')
+        batch.slopes *= batch.fractions
+        batch.waves += batch.slopes
+        return batch.waves
+
+    def next_chunk(self, sample_count=None):
+        """
+        Mix one chunk of every voice's samples
+
+        This is the whole synthesis path of the drone. It is shared by the
+        live PyAudio callback in drone.py and by the offline renderer in
+        render.py, so both always produce the same sound.
+
+        Each voice's gain moves linearly from start to start + delta over
+        the chunk, so the mix is start . waves + ramp * (delta . waves):
+        two matrix-vector products per batch rather than a gain matrix.
+
+        Args:
+            sample_count (int): Defaults to self.chunk_size
+
+        Returns: ndarray of float32, reused by the next call
+        """
+        if sample_count is None:
+            sample_count = self.chunk_size
+        if sample_count > self.chunk_size:
+            raise ValueError('Cannot render {0} samples with a chunk size of {1}'
+                             .format(sample_count, self.chunk_size))
+        deltas = self.step_amps(sample_count)
+
+        # Gains at the start and end of the chunk
+        start = numpy.maximum(self.raw_amps, self._zero, out=self._current)
+        start *= self.amp_factors
+        numpy.copyto(self._start_gains, start)
+        self.raw_amps += deltas
+        end = numpy.maximum(self.raw_amps, self._zero, out=self._scratch)
+        end *= self.amp_factors
+        end -= start
+        numpy.copyto(self._gain_deltas, end)
+
+        # A while loop, since iterating over the list would allocate
+        output = self.output
+        ramp_mix = self._ramp_mix
+        if not self._batches:
+            output.fill(0)
+            ramp_mix.fill(0)
+        i = 0
+        while i < len(self._batches):
+            batch = self._batches[i]
+            waves = self._render_batch(batch)
+            if i == 0:
+                numpy.dot(batch.start_gains, waves, out=output)
+                numpy.dot(batch.gain_deltas, waves, out=ramp_mix)
+            else:
+                output += numpy.dot(batch.start_gains, waves,
+                                    out=self._batch_mix)
+                ramp_mix += numpy.dot(batch.gain_deltas, waves,
+                                      out=self._batch_mix)
+            i += 1
+
+        self.samples_played += sample_count
+        if sample_count == self.chunk_size:
+            self.phases += self._chunk_advances
+            numpy.remainder(self.phases, self._table_size, out=self.phases)
+            ramp_mix *= self._ramp
+            output += ramp_mix
+            return output
+        self.phases += self.phase_increments * sample_count
+        numpy.remainder(self.phases, self._table_size, out=self.phases)
+        ramp = numpy.arange(1, sample_count + 1) / sample_count
+        output[:sample_count] += ramp * ramp_mix[:sample_count]
+        return output[:sample_count]
+
+
+class _VoiceBatch:
+    """
+    Views onto a bank's per-voice arrays for one batch of voices, and
+    working arrays sized for the batch
+    """
+
+    def __init__(self, bank, start, stop, scratch):
+        """
+        Args:
+            bank (OscillatorBank):
+            start (int): Index of the first voice in the batch
+            stop (int): Index after the last voice in the batch
+            scratch (dict): Working arrays sized for the largest batch,
+                shared by every batch of the bank
+        """
+        count = stop - start
+        self.phases = bank.phases[start:stop, None]
+        self.phase_increments = bank.phase_increments[start:stop, None]
+        self.start_gains = bank._start_gains[start:stop]
+        self.gain_deltas = bank._gain_deltas[start:stop]
+        for name, array in scratch.items():
+            setattr(self, name, array[:count])
+
+    @classmethod
+    def split(cls, bank, batch_size):
+        """
+        Args:
+            bank (OscillatorBank):
+            batch_size (int): Most voices in a batch
+
+        Returns: list of _VoiceBatch covering every voice of bank
+        """
+        shape = (batch_size, bank.chunk_size)
+        scratch = {
+            'positions': numpy.zeros(shape),
+            'floors': numpy.zeros(shape),
+            'indices': numpy.zeros(shape, dtype=numpy.intp),
+            'fractions': numpy.zeros(shape, dtype=numpy.float32),
+            'slopes': numpy.zeros(shape, dtype=numpy.float32),
+            'waves': numpy.zeros(shape, dtype=numpy.float32),
+            'sample_indices': numpy.zeros(shape),
+        }
+        scratch['sample_indices'][:] = numpy.arange(bank.chunk_size)
+        return [cls(bank, start, min(start + batch_size, len(bank)), scratch)
+                for start in range(0, len(bank), batch_size)]
+
+
+def chord_frequencies(pitch_classes, octaves=(0,), unison=1, detune=0):
+    """
+    Build the frequencies of a chord from frequency_map
+
+    Args:
+        pitch_classes (list of int): Keys of frequency_map
+        octaves (list of int): Octave shifts applied to every pitch class,
+            relative to frequency_map's octave (A4 to G#5)
+        unison (int): Voices per pitch
+        detune (float): Width in cents of each unison cluster. Its voices
+            are spread evenly across it, centered on the pitch.
+
+    Returns: list of float
+    """
+    if unison > 1:
+        cents = [detune * (i / (unison - 1) - 0.5) for i in range(unison)]
+    else:
+        cents = [0]
+    return [frequency_map[pitch_class] * (2.0 ** octave) *
+            (2.0 ** (cent / 1200))
+            for octave in octaves
+            for pitch_class in pitch_classes
+            for cent in cents]
+
+
+# The drone itself: E in three octaves
+pitches = chord_frequencies([4], octaves=(-1, 0, 1))
+
+
+def build_oscillators(sample_rate=SAMPLE_RATE, start_mode='OFF',
+                      frequencies=None, amp_factors=1, rng=None):
+    """
+    Build oscillators, one for each frequency
+
+    Args:
+        sample_rate (int):
+        start_mode (str): legal values: ON, OFF, STOPPING
+        frequencies (list of float): Defaults to ``pitches``
+        amp_factors (float or list of float): One for every oscillator,
+            or one per frequency
+        rng (chance.rand.RandomStream): Shared by every oscillator.
+            Defaults to the global random module.
+
+    Returns: list of Oscillator
+    """
+    if frequencies is None:
+        frequencies = pitches
+    if not isinstance(amp_factors, (list, tuple)):
+        amp_factors = [amp_factors] * len(frequencies)
+    if len(amp_factors) != len(frequencies):
+        raise ValueError('Need one amp factor per frequency')
+    stream = as_stream(rng)
+    return [Oscillator(freq, sample_rate,
+                       amp_factor, stream.uniform(-8, 0),
+                       start_mode=start_mode, rng=rng)
+            for freq, amp_factor in zip(frequencies, amp_factors)]
+
+
+def build_bank(sample_rate=SAMPLE_RATE, chunk_size=CHUNK_SIZE,
+               start_mode='OFF', frequencies=None, amp_factors=1,
+               batch_size=BATCH_SIZE, rng=None):
+    """
+    Build an OscillatorBank, by default holding the drone's oscillators
+
+    Args:
+        sample_rate (int):
+        chunk_size (int):
+        start_mode (str): legal values: ON, OFF, STOPPING
+        frequencies (list of float): Defaults to ``pitches``
+        amp_factors (float or list of float): See build_oscillators
+        batch_size (int): Most voices rendered together
+        rng (chance.rand.RandomStream): Makes the drone reproducible.
+            Defaults to the global random module.
+
+    Returns: OscillatorBank
+    """
+    return OscillatorBank(
+        build_oscillators(sample_rate, start_mode, frequencies, amp_factors,
+                          rng),
+        chunk_size, batch_size, rng)